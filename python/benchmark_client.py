@@ -0,0 +1,79 @@
+"""
+Benchmark: pooled LetterboxdClient vs. one `requests.Session()` per call
+
+Starts the offline mock API in a child process and sends the same signed
+GET /contributor/{id} request N times, once the way the example scripts do
+(a new session for every call) and once over a shared LetterboxdClient.
+
+Python 3:
+$ python3 ./benchmark_client.py
+$ python3 ./benchmark_client.py --requests 2000
+
+"""
+
+import requests
+import time
+import uuid
+import hmac
+import hashlib
+from argparse import ArgumentParser
+
+from letterboxd_client import LetterboxdClient
+from mock_server import MockLetterboxdProcess
+
+
+def session_per_call(url, api_key, api_secret):
+    # mirrors the example scripts: a new session for every request
+    session = requests.Session()
+    session.params = {}
+
+    params = {
+        'apikey': api_key,
+        'nonce': uuid.uuid4(),
+        'timestamp': int(time.time())
+    }
+
+    request = requests.Request('GET', url, params=params, headers={'Accept': 'application/json'})
+    prepared_request = session.prepare_request(request)
+
+    salted_string = b"\x00".join(
+      [str.encode(prepared_request.method), str.encode(prepared_request.url), b'']
+    )
+    signature = hmac.new(str.encode(api_secret), salted_string, digestmod=hashlib.sha256).hexdigest()
+    prepared_request.prepare_url(prepared_request.url, {'signature': signature})
+
+    response = session.send(prepared_request)
+    response.json()
+    session.close()
+
+
+def run(label, count, call):
+    start = time.perf_counter()
+    for _ in range(count):
+        call()
+    elapsed = time.perf_counter() - start
+
+    print('{:<20} {:>6} requests in {:>7.3f}s  {:>9.1f} req/s'.format(label, count, elapsed, count / elapsed))
+
+    return count / elapsed
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--requests', type=int, default=500, dest='count',
+                        help='Number of requests per pattern.')
+    args = parser.parse_args()
+
+    with MockLetterboxdProcess() as server:
+        per_call = run('session per call', args.count,
+                       lambda: session_per_call(server.base_url + '/contributor/1', server.api_key, server.api_secret))
+
+        with LetterboxdClient(server.api_key, server.api_secret, base_url=server.base_url) as client:
+            pooled = run('pooled client', args.count,
+                         lambda: client.contributor_id('1').json())
+
+    print('speed-up: {:.2f}x'.format(pooled / per_call))
+
+
+if __name__ == "__main__":
+    main()
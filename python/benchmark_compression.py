@@ -0,0 +1,85 @@
+"""
+Benchmark: wire bytes and time with and without compressed responses
+
+Starts the offline mock API in a child process, which compresses its JSON
+bodies with whatever `Accept-Encoding` the client offers, and sends the
+same mix of single-object, paginated and streamed requests twice: once
+with `Accept-Encoding: identity` and once with the client default. A
+`letterboxd_hooks.TransferHook` reports the bytes each endpoint took on the
+wire and after decoding, so the saving is measured per endpoint rather
+than estimated. The streamed contributions pages go through
+`letterboxd_stream`, which decodes the compressed body incrementally.
+
+Python 3:
+$ python3 ./benchmark_compression.py
+$ python3 ./benchmark_compression.py --requests 400 --concurrency 16 --latency 0.01
+
+"""
+
+import time
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+from urllib3.util.request import ACCEPT_ENCODING
+
+from letterboxd_client import LetterboxdClient
+from letterboxd_hooks import TransferHook
+from letterboxd_stream import stream_items
+from mock_server import MockLetterboxdProcess, lid
+
+
+def workload(count):
+    kinds = ('contributor', 'contributions', 'search', 'stream')
+    return [(kinds[number % len(kinds)], number) for number in range(count)]
+
+
+def call(client, request):
+    kind, number = request
+    if kind == 'contributor':
+        client.contributor_id(lid(number % 500)).json()
+    elif kind == 'contributions':
+        client.contributor_id_contributions(lid(number % 500), perPage=100).json()
+    elif kind == 'search':
+        client.search('film {}'.format(number % 97), perPage=20).json()
+    else:
+        for _ in stream_items(client, '/contributor/{}/contributions'.format(lid(number % 500)),
+                              all_pages=False, perPage=100):
+            pass
+
+
+def run(label, server, accept_encoding, requests, concurrency):
+    hook = TransferHook()
+    with LetterboxdClient(server.api_key, server.api_secret, base_url=server.base_url,
+                          pool_maxsize=concurrency, hooks=[hook], accept_encoding=accept_encoding) as client:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda request: call(client, request), requests))
+        elapsed = time.perf_counter() - start
+
+    print('{} ({}): {} requests in {:.3f}s'.format(label, accept_encoding, len(requests), elapsed))
+    print('  {:<40} {:>9} {:>12} {:>12} {:>7}'.format('endpoint', 'responses', 'wire', 'decoded', 'saved'))
+    for endpoint, totals in hook.report().items():
+        print('  {:<40} {:>9} {:>12} {:>12} {:>6.1%}'.format(endpoint, totals['responses'], totals['wire_bytes'],
+                                                             totals['decoded_bytes'], totals['saved']))
+
+    return sum(totals['wire_bytes'] for totals in hook.report().values())
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--requests', type=int, default=400, dest='count', help='Requests per run.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Threads sending requests.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds the mock adds to every response.')
+    args = parser.parse_args()
+
+    requests = workload(args.count)
+
+    with MockLetterboxdProcess(latency=args.latency) as server:
+        identity = run('uncompressed', server, 'identity', requests, args.concurrency)
+        compressed = run('compressed', server, ACCEPT_ENCODING, requests, args.concurrency)
+
+    print('wire bytes: {:.1%} of uncompressed'.format(compressed / identity))
+
+
+if __name__ == "__main__":
+    main()
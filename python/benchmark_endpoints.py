@@ -0,0 +1,120 @@
+"""
+Offline load test for every endpoint wrapper
+
+Starts `mock_server.MockLetterboxd` in a child process and calls each
+`LetterboxdClient` endpoint method repeatedly from a pool of worker threads,
+then reports p50/p99 latency, throughput and the peak memory the client
+allocates per request. Memory is traced in a separate, shorter pass so the
+tracing overhead does not skew the timings. Use `--json` to write the
+results to a file that can be compared between runs to catch performance
+regressions.
+
+Python 3:
+$ python3 ./benchmark_endpoints.py
+$ python3 ./benchmark_endpoints.py --requests 2000 --concurrency 16 --latency 0.005 --json results.json
+
+"""
+
+import json
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+from letterboxd_client import LetterboxdClient
+from mock_server import MockLetterboxdProcess, lid
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def endpoint_calls(client, access_token):
+    # every endpoint wrapper with representative arguments
+    return {
+        'POST /auth/forgotten-password-request': lambda: client.auth_forgotten_password_request('me@example.com'),
+        'POST /auth/token': lambda: client.auth_token_generate('benchmark', 'hunter2'),
+        'GET /auth/username-check': lambda: client.auth_username_check('benchmark'),
+        'GET /contributor/{id}': lambda: client.contributor_id('1'),
+        'GET /contributor/{id}/contributions': lambda: client.contributor_id_contributions('1', perPage=100),
+        'GET /film/{id}': lambda: client.film_id(lid(100000)),
+        'GET /films/film-services': lambda: client.films_film_services(),
+        'GET /films/genres': lambda: client.films_genres(),
+        'GET /me': lambda: client.me_get(access_token),
+        'PATCH /me': lambda: client.me_patch({'bio': 'I am Iron Man.'}, access_token),
+        'POST /me/validation-request': lambda: client.me_validation_request(access_token),
+        'GET /news': lambda: client.news(perPage=100),
+        'GET /search': lambda: client.search('Film 1', perPage=100)
+    }
+
+
+def benchmark(call, count, concurrency, memory_samples=20):
+    def timed(_):
+        start = time.perf_counter()
+        response = call()
+        if response.content:
+            response.json()
+        return time.perf_counter() - start, response.status_code
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed, range(count)))
+    elapsed = time.perf_counter() - start
+
+    # peak allocation of a single request/decode, traced on its own
+    tracemalloc.start()
+    peak = 0
+    for _ in range(memory_samples):
+        tracemalloc.reset_peak()
+        timed(None)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+    tracemalloc.stop()
+
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, status in results if status >= 400)
+
+    return {
+        'requests': count,
+        'errors': errors,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'throughput': count / elapsed,
+        'peak_memory_kib': peak / 1024
+    }
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--requests', type=int, default=300, dest='count',
+                        help='Number of requests per endpoint.')
+    parser.add_argument('--concurrency', type=int, default=8,
+                        help='Number of worker threads sharing the client.')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='Seconds of latency the mock server adds to every response.')
+    parser.add_argument('--json', dest='json_path',
+                        help='Write the results to this file as JSON.')
+    args = parser.parse_args()
+
+    results = {}
+
+    with MockLetterboxdProcess(latency=args.latency) as server:
+        with LetterboxdClient(server.api_key, server.api_secret, base_url=server.base_url,
+                              pool_maxsize=args.concurrency) as client:
+            access_token = client.auth_token_generate('benchmark', 'hunter2').json()['access_token']
+
+            print('{:<40} {:>8} {:>6} {:>9} {:>9} {:>10} {:>11}'.format(
+                'endpoint', 'requests', 'errors', 'p50 ms', 'p99 ms', 'req/s', 'peak KiB'))
+
+            for name, call in endpoint_calls(client, access_token).items():
+                result = results[name] = benchmark(call, args.count, args.concurrency)
+                print('{:<40} {requests:>8} {errors:>6} {p50_ms:>9.2f} {p99_ms:>9.2f} '
+                      '{throughput:>10.1f} {peak_memory_kib:>11.1f}'.format(name, **result))
+
+    if args.json_path:
+        with open(args.json_path, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
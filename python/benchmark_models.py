@@ -0,0 +1,78 @@
+"""
+Benchmark: memory per 100k film contributions, plain dicts vs. slotted models
+
+Generates a synthetic GET /contributor/{id}/contributions payload, decodes
+it once into plain dicts and once into `letterboxd_models.FilmContribution`
+instances, and prints the memory each representation keeps alive plus the
+time it took to build.
+
+Python 3.10+:
+$ python3 ./benchmark_models.py
+$ python3 ./benchmark_models.py --records 500000
+
+"""
+
+import gc
+import json
+import time
+import tracemalloc
+from argparse import ArgumentParser
+
+from letterboxd_models import FilmContribution, iter_models
+
+
+def contributions_payload(count):
+    items = []
+    for i in range(count):
+        items.append({
+            'type': 'Director' if i % 3 else 'Actor',
+            'characterName': None if i % 3 else 'Character {}'.format(i),
+            'film': {
+                'id': format(i, 'x'),
+                'name': 'Film {}'.format(i),
+                'originalName': 'Original Film {}'.format(i),
+                'releaseYear': 1950 + i % 70,
+                'directors': [{'id': '2tn5', 'name': 'Quentin Tarantino'}]
+            }
+        })
+
+    return json.dumps({'items': items}).encode()
+
+
+def measure(label, count, build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    records = build()
+
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print('{:<16} {:>9.1f} MiB per {} records  ({:>6.1f} bytes/record, built in {:.2f}s)'.format(
+        label, retained / 2 ** 20, count, retained / len(records), elapsed))
+
+    del records
+
+    return retained
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--records', type=int, default=100000, dest='count',
+                        help='Number of film contributions.')
+    args = parser.parse_args()
+
+    payload = contributions_payload(args.count)
+
+    dicts = measure('plain dicts', args.count, lambda: json.loads(payload)['items'])
+    models = measure('slotted models', args.count,
+                     lambda: list(iter_models(FilmContribution, json.loads(payload)['items'])))
+
+    print('memory saved: {:.1f}%'.format(100 * (1 - models / dicts)))
+
+
+if __name__ == "__main__":
+    main()
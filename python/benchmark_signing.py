@@ -0,0 +1,86 @@
+"""
+Benchmark: per-request HMAC + prepare_url vs. the cached Signer
+
+Signs the same prepared GET /search request N times, once the way the
+example scripts do and once with `letterboxd_signing.Signer`, checks that
+both produce the same signed URL and prints signatures/sec for each.
+
+Python 3:
+$ python3 ./benchmark_signing.py
+$ python3 ./benchmark_signing.py --signatures 200000
+
+"""
+
+import requests
+import time
+import uuid
+import hmac
+import hashlib
+from argparse import ArgumentParser
+
+from letterboxd_signing import Signer
+
+base_url = 'https://api.letterboxd.com/api/v0'
+api_key = 'benchmark-key'
+api_secret = 'benchmark-secret'
+
+
+def prepared_search_request():
+    params = {
+        'apikey': api_key,
+        'nonce': uuid.uuid4(),
+        'timestamp': int(time.time()),
+        'input': 'Pulp Fiction'
+    }
+    request = requests.Request('GET', base_url + '/search', params=params, headers={'Accept': 'application/json'})
+
+    return request.prepare()
+
+
+def sign_like_the_scripts(prepared_request):
+    salted_string = b"\x00".join(
+      [str.encode(prepared_request.method), str.encode(prepared_request.url), str.encode('')]
+    )
+    hmac_signature = hmac.new(str.encode(api_secret), salted_string, digestmod=hashlib.sha256)
+    signature = hmac_signature.hexdigest()
+    prepared_request.prepare_url(prepared_request.url, {'signature': signature})
+
+    return prepared_request.url
+
+
+def run(label, count, call):
+    start = time.perf_counter()
+    for _ in range(count):
+        call()
+    elapsed = time.perf_counter() - start
+
+    print('{:<20} {:>8} signatures in {:>7.3f}s  {:>11.1f} sig/s'.format(label, count, elapsed, count / elapsed))
+
+    return count / elapsed
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--signatures', type=int, default=50000, dest='count',
+                        help='Number of signatures per pattern.')
+    args = parser.parse_args()
+
+    prepared_request = prepared_search_request()
+    unsigned_url = prepared_request.url
+    signer = Signer(api_secret)
+
+    # both approaches must produce the exact same signed URL
+    assert signer.sign_url('GET', unsigned_url) == sign_like_the_scripts(prepared_request.copy())
+
+    def per_request():
+        prepared_request.url = unsigned_url
+        sign_like_the_scripts(prepared_request)
+
+    before = run('per-request HMAC', args.count, per_request)
+    after = run('cached Signer', args.count, lambda: signer.sign_url('GET', unsigned_url))
+
+    print('speed-up: {:.2f}x'.format(after / before))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark: cold-start import cost of the CLI vs. the example scripts
+
+Runs fresh interpreters with `-X importtime` and reports the total time
+spent importing modules and the wall-clock time of each process for:
+
+* `letterboxd_cli.py --help` (argument parsing only, no handler imported)
+* importing `letterboxd_cli` and the `contributor` handler's dependencies
+* loading an example script (`contributor_id.py`) with its eager imports
+
+Only `--help` and argument errors start faster than a script: a command
+that sends a request needs `requests`, which dominates the import time
+either way, plus the client's own modules on top.
+
+Python 3:
+$ python3 ./benchmark_startup.py
+$ python3 ./benchmark_startup.py --runs 20
+
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+commands = {
+    'cli --help': ['letterboxd_cli.py', '--help'],
+    'cli + contributor deps': ['-c', 'import letterboxd_cli, letterboxd_client, letterboxd_stream'],
+    'contributor_id.py': ['-c', 'import runpy; runpy.run_path("contributor_id.py")']
+}
+
+
+def import_time(stderr):
+    # `-X importtime` lines look like "import time: self [us] | cumulative | imported package";
+    # only top-level imports (no leading indentation) are summed to avoid double counting
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|', 2)
+        if not name.startswith('  '):
+            total += int(cumulative)
+
+    return total
+
+
+def measure(arguments, runs):
+    imports, walls = [], []
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-X', 'importtime'] + arguments, cwd=here,
+                                 stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+        walls.append(time.perf_counter() - start)
+        imports.append(import_time(process.stderr))
+
+    return statistics.median(imports) / 1000, statistics.median(walls) * 1000
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10, help='Interpreter launches per command.')
+    args = parser.parse_args()
+
+    print('{:<26} {:>12} {:>12}'.format('command', 'imports ms', 'wall ms'))
+    for label, arguments in commands.items():
+        imports, wall = measure(arguments, args.runs)
+        print('{:<26} {:>12.1f} {:>12.1f}'.format(label, imports, wall))
+
+
+if __name__ == "__main__":
+    main()
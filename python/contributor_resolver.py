@@ -0,0 +1,148 @@
+"""
+Batch GET /contributor/{id}
+http://api-docs.letterboxd.com/#path--contributor--id-
+
+`contributor_id.py` resolves one ID typed in by hand. `ContributorResolver`
+resolves whole, heavily duplicated ID lists: duplicates are removed, lookups
+for an ID that is already being fetched wait for that request instead of
+sending another one, the remaining lookups run on a bounded worker pool and
+every result, including "no contributor matches the specified ID" (404), is
+memoized in a size-bounded LRU.
+
+Python 3:
+$ python3 ./contributor_resolver.py 2tn5 2tn5 3E6
+
+>>> from contributor_resolver import ContributorResolver
+>>> resolver = ContributorResolver(client)
+>>> contributors = resolver.resolve_many(director_ids)
+
+"""
+
+import json
+import threading
+import sys
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from letterboxd_client import LetterboxdClient, LetterboxdError
+
+
+class ContributorResolver:
+    """Resolves contributor IDs with coalescing, a worker pool and an LRU memo.
+
+    `resolve()` returns the Contributor JSON, or None when no contributor
+    matches the ID. Other error statuses raise `LetterboxdError` and are not
+    memoized, so they are retried on the next lookup.
+
+    `workers` defaults to the client's `pool_maxsize`: more threads than
+    pooled connections would open connections the pool then throws away.
+    """
+
+    def __init__(self, client, workers=None, max_size=100000):
+        self.client = client
+        self.workers = workers or getattr(client, 'pool_maxsize', 10)
+        self.max_size = max_size
+
+        self.memo = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def _lookup(self, contributor_id):
+        # called with the lock held
+        if contributor_id in self.memo:
+            self.memo.move_to_end(contributor_id)
+            self.hits += 1
+            return self.memo[contributor_id], None, False
+
+        future = self.in_flight.get(contributor_id)
+        if future is not None:
+            self.coalesced += 1
+            return None, future, False
+
+        self.misses += 1
+        future = self.in_flight[contributor_id] = Future()
+
+        return None, future, True
+
+    def _fetch(self, contributor_id, future):
+        try:
+            response = self.client.contributor_id(contributor_id)
+
+            if response.status_code == 200:
+                result = response.json()
+            elif response.status_code == 404:
+                # no contributor matches the specified ID, remember that too
+                result = None
+            else:
+                raise LetterboxdError(response)
+        except Exception as error:
+            with self.lock:
+                del self.in_flight[contributor_id]
+            future.set_exception(error)
+            raise
+
+        with self.lock:
+            del self.in_flight[contributor_id]
+            self.memo[contributor_id] = result
+            while len(self.memo) > self.max_size:
+                self.memo.popitem(last=False)
+        future.set_result(result)
+
+        return result
+
+    def resolve(self, contributor_id):
+        with self.lock:
+            result, future, owner = self._lookup(contributor_id)
+
+        if future is None:
+            return result
+        if owner:
+            return self._fetch(contributor_id, future)
+
+        return future.result()
+
+    def resolve_many(self, contributor_ids, return_exceptions=False):
+        """Resolve every ID in `contributor_ids`; returns a dict keyed by ID."""
+        results = {}
+        pending = {}
+        to_fetch = []
+
+        with self.lock:
+            for contributor_id in dict.fromkeys(contributor_ids):
+                result, future, owner = self._lookup(contributor_id)
+                if future is None:
+                    results[contributor_id] = result
+                else:
+                    pending[contributor_id] = future
+                    if owner:
+                        to_fetch.append((contributor_id, future))
+
+        if to_fetch:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for contributor_id, future in to_fetch:
+                    executor.submit(self._fetch, contributor_id, future)
+
+        for contributor_id, future in pending.items():
+            try:
+                results[contributor_id] = future.result()
+            except Exception as error:
+                if not return_exceptions:
+                    raise
+                results[contributor_id] = error
+
+        return results
+
+
+if __name__ == "__main__":
+    client = LetterboxdClient.from_input()
+    resolver = ContributorResolver(client)
+
+    for contributor_id, contributor in resolver.resolve_many(sys.argv[1:]).items():
+        if contributor is None:
+            print(contributor_id, 'No contributor matches the specified ID')
+        else:
+            print(contributor_id, json.dumps(contributor))
@@ -0,0 +1,282 @@
+"""
+Bulk imdb/tmdb -> LID resolution for `filmId` parameters
+http://api-docs.letterboxd.com/#path--films
+
+`filmId` accepts Letterboxd IDs as well as `imdb:` and `tmdb:` prefixed
+external IDs (see `contributor_id_contributions.py`), and catalogue joins
+keep sending the same external IDs to be resolved over and over.
+`FilmIdResolver` resolves them in bulk, up to 100 per GET /films, and keeps
+every mapping it sees, in both directions, in a `FilmIdMap`: a compact
+file-backed hash table that is memory-mapped, so a lookup reads only the
+slots it probes, and persists across runs. `rewrite` replaces the external
+IDs in request params by LIDs before the request is sent.
+
+Python 3:
+$ python3 ./film_id_resolver.py imdb:tt0110912 tmdb:16869 2cCk --map film-ids.map
+
+>>> from film_id_resolver import FilmIdMap, FilmIdResolver
+>>> resolver = FilmIdResolver(client, FilmIdMap('film-ids.map'))
+>>> resolver.resolve_many(['imdb:tt0110912', 'tmdb:16869'])
+>>> client.contributor_id_contributions('2tn5', **resolver.rewrite({'filmId': ['imdb:tt0110912']}))
+
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+from argparse import ArgumentParser
+
+from letterboxd_client import LetterboxdClient
+from letterboxd_pagination import paginate
+from letterboxd_stream import write_ndjson
+
+external_types = ('imdb', 'tmdb')
+
+# header: magic, number of slots (a power of two), number of entries
+_header = struct.Struct('<8sQQ')
+_magic = b'LBFIDS02'
+# maps written before slots held a check hash; they are only a cache and are started over
+_old_magics = (b'LBFIDS01',)
+# slot: 64-bit key hash (0 marks an empty slot), a second 64-bit hash of the key to tell
+# colliding keys apart, NUL-padded value
+_slot = struct.Struct('<QQ16s')
+
+
+def normalize(film_id):
+    """Canonical form of a `filmId`: LIDs as they are, prefixes and IMDb IDs in lower case."""
+    film_id = film_id.strip()
+    prefix, separator, value = film_id.partition(':')
+    if not separator:
+        return film_id
+
+    prefix = prefix.lower()
+    value = value.strip()
+
+    return prefix + ':' + (value.lower() if prefix == 'imdb' else value)
+
+
+def _key_hashes(key):
+    # two halves of one 128-bit digest: the first places the key, both must match on lookup,
+    # so a colliding key is never taken for another one
+    digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+    return int.from_bytes(digest[:8], 'little') or 1, int.from_bytes(digest[8:], 'little')
+
+
+class FilmIdMap:
+    """Persistent, memory-mapped open-addressing map of film identifiers.
+
+    Holds `imdb:<id>`/`tmdb:<id>` -> LID and LID -> external ID entries in
+    fixed 32-byte slots with linear probing; the file doubles when it is
+    more than `load_factor` full. Each slot keeps 128 bits of hash of its
+    key, which are all compared on lookup. Only one process should write to
+    a map.
+    """
+
+    load_factor = 0.7
+
+    def __init__(self, path, slots=1 << 16):
+        self.path = path
+        self.lock = threading.Lock()
+
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            self._create(path, slots)
+        self._open()
+
+    @staticmethod
+    def _create(path, slots):
+        with open(path, 'wb') as file:
+            file.write(_header.pack(_magic, slots, 0))
+            file.truncate(_header.size + slots * _slot.size)
+
+    def _open(self):
+        self.file = open(self.path, 'r+b')
+        self.map = mmap.mmap(self.file.fileno(), 0)
+
+        magic, self.slots, self.count = _header.unpack_from(self.map, 0)
+        if magic in _old_magics:
+            self.map.close()
+            self.file.close()
+            self._create(self.path, self.slots)
+            return self._open()
+        if magic != _magic:
+            raise ValueError('{} is not a film ID map'.format(self.path))
+
+    def close(self):
+        with self.lock:
+            self.map.flush()
+            self.map.close()
+            self.file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, key_hash, check_hash):
+        # index of the slot holding the key, or of the empty slot where it would go
+        mask = self.slots - 1
+        index = key_hash & mask
+        while True:
+            offset = _header.size + index * _slot.size
+            stored = int.from_bytes(self.map[offset:offset + 8], 'little')
+            if stored == 0:
+                return index, False
+            if stored == key_hash and int.from_bytes(self.map[offset + 8:offset + 16], 'little') == check_hash:
+                return index, True
+            index = (index + 1) & mask
+
+    def get(self, key):
+        with self.lock:
+            index, found = self._find(*_key_hashes(key))
+            if not found:
+                return None
+            _, _, value = _slot.unpack_from(self.map, _header.size + index * _slot.size)
+
+        return value.rstrip(b'\x00').decode()
+
+    def _put(self, key_hash, check_hash, value):
+        # called with the lock held
+        index, found = self._find(key_hash, check_hash)
+        _slot.pack_into(self.map, _header.size + index * _slot.size, key_hash, check_hash, value)
+        if not found:
+            self.count += 1
+            _header.pack_into(self.map, 0, _magic, self.slots, self.count)
+
+    def put(self, key, value):
+        value = value.encode()
+        if len(value) > 16:
+            # longer than any LID or external ID; not worth a wider slot
+            return
+
+        with self.lock:
+            if self.count + 1 > self.slots * self.load_factor:
+                self._grow()
+            self._put(*_key_hashes(key), value)
+
+    def _grow(self):
+        # rehash into a file twice the size next to this one, then swap it in
+        entries = []
+        for index in range(self.slots):
+            key_hash, check_hash, value = _slot.unpack_from(self.map, _header.size + index * _slot.size)
+            if key_hash:
+                entries.append((key_hash, check_hash, value))
+
+        temporary_path = self.path + '.tmp'
+        self._create(temporary_path, self.slots * 2)
+        self.map.close()
+        self.file.close()
+        os.replace(temporary_path, self.path)
+
+        self._open()
+        for key_hash, check_hash, value in entries:
+            self._put(key_hash, check_hash, value)
+
+    def add_film(self, film):
+        """Store the mappings of a film with `links`, in both directions."""
+        for link in film.get('links', []):
+            if link.get('type') in external_types:
+                self.put(normalize(link['type'] + ':' + link['id']), film['id'])
+                self.put(film['id'] + '>' + link['type'], link['id'])
+
+    def external_id(self, lid, link_type='imdb'):
+        """The `link_type` ID of the film with Letterboxd ID `lid`, if known."""
+        return self.get(lid + '>' + link_type)
+
+
+class FilmIdResolver:
+    """Resolves mixed LID/imdb/tmdb film IDs to LIDs, mostly without the network.
+
+    External IDs missing from the map are resolved `batch_size` at a time
+    with GET /films. IDs the API doesn't know are remembered for the
+    lifetime of the resolver only, in case the film is added later.
+    """
+
+    def __init__(self, client, id_map, batch_size=100):
+        self.client = client
+        self.id_map = id_map
+        self.batch_size = batch_size
+        self.unknown = set()
+
+        self.hits = 0
+        self.misses = 0
+
+    def learn(self, films):
+        """Add the mappings of film summaries seen elsewhere, e.g. in contributions."""
+        for film in films:
+            self.id_map.add_film(film)
+
+    def resolve_many(self, film_ids):
+        """Resolve every ID in `film_ids`; returns a dict of ID -> LID (None if not found)."""
+        results = {}
+        to_fetch = {}
+
+        for film_id in dict.fromkeys(film_ids):
+            key = normalize(film_id)
+            if ':' not in key:
+                results[film_id] = key
+                continue
+
+            lid = self.id_map.get(key)
+            if lid is not None or key in self.unknown:
+                self.hits += 1
+                results[film_id] = lid
+            else:
+                self.misses += 1
+                to_fetch.setdefault(key, []).append(film_id)
+
+        keys = list(to_fetch)
+        for start in range(0, len(keys), self.batch_size):
+            batch = keys[start:start + self.batch_size]
+            self.learn(paginate(self.client.films, filmId=batch, perPage=self.batch_size))
+
+            for key in batch:
+                lid = self.id_map.get(key)
+                if lid is None:
+                    self.unknown.add(key)
+                for film_id in to_fetch[key]:
+                    results[film_id] = lid
+
+        return results
+
+    def rewrite(self, params):
+        """Copy of request `params` with every resolvable `filmId` replaced by its LID."""
+        if 'filmId' not in params:
+            return params
+
+        film_ids = params['filmId']
+        single = isinstance(film_ids, str)
+        film_ids = [film_ids] if single else list(film_ids)
+
+        # IDs that can't be resolved are passed on as they are, for the API to decide
+        resolved = self.resolve_many(film_ids)
+        film_ids = [resolved[film_id] or film_id for film_id in film_ids]
+
+        return dict(params, filmId=film_ids[0] if single else film_ids)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('film_ids', nargs='*', metavar='film_id',
+                        help='LIDs or imdb:/tmdb: prefixed IDs (default: one per line from stdin).')
+    parser.add_argument('--map', default='film-ids.map', help='File holding the ID map.')
+    parser.add_argument('--config', help='INI file with the API Key and API Secret.')
+    args = parser.parse_args()
+
+    film_ids = args.film_ids or [line.strip() for line in sys.stdin if line.strip()]
+    id_map = FilmIdMap(args.map)
+
+    try:
+        with LetterboxdClient.from_config(args.config) as client:
+            resolver = FilmIdResolver(client, id_map)
+            results = resolver.resolve_many(film_ids)
+    finally:
+        id_map.close()
+
+    write_ndjson(({'filmId': film_id, 'lid': lid} for film_id, lid in results.items()), sys.stdout)
+    sys.stderr.write('{} hits, {} misses\n'.format(resolver.hits, resolver.misses))
+
+
+if __name__ == "__main__":
+    main()
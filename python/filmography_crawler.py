@@ -0,0 +1,276 @@
+"""
+Parallel filmography crawler for GET /contributor/{id}/contributions
+http://api-docs.letterboxd.com/#path--contributor--id--contributions
+
+Walking one contributor's pages one at a time is slow for thousands of
+filmographies. The crawler splits every filmography into independent
+partitions using the endpoint's own filters (`type` and/or `decade`) and
+fetches all partitions in parallel. For `type` partitions the contributor's
+statistics are used to skip contribution types without any films. A
+partition is only split by decade when its first page shows it has more
+than one page; films without a release year match no `decade` and are
+fetched separately when the decades don't add up to `metadata.totalCount`.
+
+Completed partitions are recorded in a checkpoint file, so an interrupted
+crawl resumes where it left off. A partition's contributions are written
+only once the whole partition has been fetched, so the output never holds
+duplicates from a partition that was cut off halfway.
+
+Python 3:
+$ export LETTERBOXD_API_KEY=... LETTERBOXD_API_SECRET=...
+$ python3 ./filmography_crawler.py 2tn5 3E6 --partition type --partition decade > contributions.ndjson
+$ python3 ./filmography_crawler.py --seeds directors.txt --checkpoint crawl.checkpoint --output contributions.ndjson
+
+"""
+
+import datetime
+import json
+import os
+import sys
+import threading
+from argparse import ArgumentParser
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from letterboxd_client import LetterboxdClient, LetterboxdError
+from letterboxd_pagination import paginate
+from letterboxd_stream import dumps
+
+# see here for the full list http://api-docs.letterboxd.com/#/definitions/ContributionType
+contribution_types = [
+    'Director', 'CoDirector', 'Actor', 'Producer', 'Writer', 'Editor', 'Cinematography',
+    'ArtDirection', 'VisualEffects', 'Composer', 'Sound', 'Costumes', 'MakeUp', 'Studio'
+]
+
+first_decade = 1870
+# stands in for a decade in the partition of films without a release year
+undated = 'undated'
+
+
+def decades():
+    return list(range(first_decade, datetime.date.today().year + 1, 10))
+
+
+def partition_key(contributor_id, partition):
+    return contributor_id + '?' + '&'.join('{}={}'.format(key, partition[key]) for key in sorted(partition))
+
+
+class Checkpoint:
+    """Append-only file of partition keys that have been fully written."""
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+
+        if path and os.path.exists(path):
+            with open(path, encoding='utf-8') as file:
+                self.done = set(line.rstrip('\n') for line in file if line.strip())
+
+        self.file = open(path, 'a', encoding='utf-8') if path else None
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def add(self, key):
+        self.done.add(key)
+        if self.file is not None:
+            self.file.write(key + '\n')
+            self.file.flush()
+            os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+class FilmographyCrawler:
+    """Crawls the contributions of many contributors, partition by partition.
+
+    `partition_by` is a list of filters to split on, any of `'type'` and
+    `'decade'`; splitting on both crawls every (type, decade) combination
+    of the types with more than one page of films.
+    `workers` partitions are fetched at a time over the shared `client`.
+    """
+
+    def __init__(self, client, out, checkpoint=None, partition_by=('type',), workers=16, per_page=100):
+        self.client = client
+        self.out = out
+        self.checkpoint = checkpoint or Checkpoint(None)
+        self.partition_by = tuple(partition_by)
+        self.workers = workers
+        self.per_page = per_page
+        self.lock = threading.Lock()
+        # per partition split by decade: [totalCount, decades left, contributions seen, all seen]
+        self.splits = {}
+
+        self.partitions_done = 0
+        self.contributions_written = 0
+
+    def types(self, contributor_id):
+        # only crawl the contribution types the contributor has films for
+        response = self.client.contributor_id(contributor_id)
+        if response.status_code == 404:
+            return []
+        if response.status_code != 200:
+            raise LetterboxdError(response)
+
+        statistics = response.json().get('statistics', {}).get('contributions')
+        if statistics is None:
+            return contribution_types
+
+        return [stat['type'] for stat in statistics if stat.get('filmCount')]
+
+    def partitions(self, contributor_id):
+        partitions = [{}]
+
+        if 'type' in self.partition_by:
+            partitions = [dict(partition, type=contribution_type)
+                          for partition in partitions for contribution_type in self.types(contributor_id)]
+
+        # split by decade later, see `split_decades`
+        return partitions
+
+    def write(self, contributor_id, partition, contributions):
+        lines = b''.join(dumps({'contributor': contributor_id, 'contribution': contribution}) + b'\n'
+                         for contribution in contributions)
+
+        # write and checkpoint together, so a resumed crawl never writes a partition twice
+        with self.lock:
+            self.out.write(lines)
+            self.out.flush()
+            self.checkpoint.add(partition_key(contributor_id, partition))
+            self.partitions_done += 1
+            self.contributions_written += len(contributions)
+
+    def split_decades(self, contributor_id, partition):
+        # one page is cheaper than a request for every decade, most of them empty
+        response = self.client.contributor_id_contributions(contributor_id, perPage=self.per_page, **partition)
+        if response.status_code != 200:
+            raise LetterboxdError(response)
+
+        json_response = response.json()
+        if not json_response.get('next'):
+            self.write(contributor_id, partition, json_response.get('items', []))
+            return []
+
+        total = json_response.get('metadata', {}).get('totalCount')
+        pending = [dict(partition, decade=decade) for decade in decades()]
+        pending = [decade_partition for decade_partition in pending
+                   if partition_key(contributor_id, decade_partition) not in self.checkpoint]
+
+        # the sizes of decades crawled by an earlier run are unknown
+        complete = total is not None and len(pending) == len(decades())
+        if not pending:
+            return self.undated_partitions(contributor_id, partition, total, 0, complete)
+
+        with self.lock:
+            self.splits[partition_key(contributor_id, partition)] = [total, len(pending), 0, complete]
+
+        return pending
+
+    def decade_done(self, contributor_id, partition, count):
+        key = partition_key(contributor_id, partition)
+        with self.lock:
+            split = self.splits[key]
+            split[1] -= 1
+            split[2] += count
+            if split[1] > 0:
+                return []
+            del self.splits[key]
+
+        total, _, seen, complete = split
+
+        return self.undated_partitions(contributor_id, partition, total, seen, complete)
+
+    def undated_partitions(self, contributor_id, partition, total, seen, complete):
+        # once every decade is in, the films without a year are fetched if the decades fall short
+        undated_partition = dict(partition, decade=undated)
+        if (complete and seen >= total) or partition_key(contributor_id, undated_partition) in self.checkpoint:
+            return []
+
+        return [undated_partition]
+
+    def crawl_partition(self, contributor_id, partition):
+        """Fetch and write one partition; returns the partitions to crawl next, if any."""
+        if 'decade' in self.partition_by and 'decade' not in partition:
+            return self.split_decades(contributor_id, partition)
+
+        decade = partition.get('decade')
+        if decade == undated:
+            # no filter selects them, so the whole partition is walked for the films without a year
+            params = {key: value for key, value in partition.items() if key != 'decade'}
+            contributions = [contribution for contribution in
+                             paginate(self.client.contributor_id_contributions, contributor_id,
+                                      perPage=self.per_page, **params)
+                             if contribution.get('film', {}).get('releaseYear') is None]
+        else:
+            contributions = list(paginate(self.client.contributor_id_contributions, contributor_id,
+                                          perPage=self.per_page, **partition))
+
+        self.write(contributor_id, partition, contributions)
+
+        if decade is not None and decade != undated:
+            parent = {key: value for key, value in partition.items() if key != 'decade'}
+            return self.decade_done(contributor_id, parent, len(contributions))
+
+        return []
+
+    def crawl(self, contributor_ids):
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # partitioning itself needs a request per contributor for the statistics
+            planned = executor.map(lambda contributor_id: (contributor_id, self.partitions(contributor_id)),
+                                   dict.fromkeys(contributor_ids))
+
+            pending = {}
+
+            def submit(contributor_id, partition):
+                pending[executor.submit(self.crawl_partition, contributor_id, partition)] = contributor_id
+
+            for contributor_id, partitions in planned:
+                for partition in partitions:
+                    if partition_key(contributor_id, partition) not in self.checkpoint:
+                        submit(contributor_id, partition)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    contributor_id = pending.pop(future)
+                    for partition in future.result():
+                        submit(contributor_id, partition)
+
+        return self.contributions_written
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('contributor_ids', nargs='*', metavar='contributor_id',
+                        help='Contributor LIDs to crawl, e.g. 2tn5 for Quentin Tarantino.')
+    parser.add_argument('--seeds', help='File with one contributor LID per line.')
+    parser.add_argument('--partition', action='append', choices=['type', 'decade'],
+                        help='Filter to split each filmography on (repeatable, default: type).')
+    parser.add_argument('--workers', type=int, default=16, help='Partitions fetched in parallel.')
+    parser.add_argument('--checkpoint', help='File recording completed partitions, for resuming.')
+    parser.add_argument('--output', help='NDJSON file to append to (default: stdout).')
+    parser.add_argument('--config', help='INI file with the API Key and API Secret.')
+    args = parser.parse_args()
+
+    contributor_ids = list(args.contributor_ids)
+    if args.seeds:
+        with open(args.seeds, encoding='utf-8') as file:
+            contributor_ids += [line.strip() for line in file if line.strip()]
+
+    out = open(args.output, 'ab') if args.output else sys.stdout.buffer
+    checkpoint = Checkpoint(args.checkpoint)
+
+    try:
+        with LetterboxdClient.from_config(args.config, pool_maxsize=args.workers) as client:
+            crawler = FilmographyCrawler(client, out, checkpoint, args.partition or ['type'], args.workers)
+            crawler.crawl(contributor_ids)
+    finally:
+        checkpoint.close()
+
+    sys.stderr.write(json.dumps({'partitions': crawler.partitions_done,
+                                 'contributions': crawler.contributions_written}) + '\n')
+
+
+if __name__ == "__main__":
+    main()
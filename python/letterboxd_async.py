@@ -0,0 +1,232 @@
+"""
+asyncio Letterboxd API client
+http://api-docs.letterboxd.com/#signing
+
+Async counterpart of `LetterboxdClient` built on aiohttp. Every request gets
+its own nonce, timestamp and HMAC signature at the moment it is sent, so
+hundreds of requests can be in flight at once from a single process.
+
+Python 3 (requires `pip install aiohttp`):
+>>> import asyncio
+>>> from letterboxd_async import AsyncLetterboxdClient
+>>> async def main():
+...     async with AsyncLetterboxdClient(api_key, api_secret) as client:
+...         responses = await client.map(client.contributor_id, ['2tn5', '3E6'], concurrency=50)
+...         return [response.json() for response in responses]
+>>> asyncio.run(main())
+
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import urlencode
+from getpass import getpass
+
+import aiohttp
+from yarl import URL
+
+from letterboxd_client import Endpoints, base_url
+from letterboxd_nonce import ServerClock, nonces
+from letterboxd_signing import Signer
+
+
+class AsyncResponse:
+    """The parts of an aiohttp response the examples use, read eagerly."""
+
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    def json(self):
+        return json.loads(self.content)
+
+    def __repr__(self):
+        return '<AsyncResponse [{}]>'.format(self.status_code)
+
+
+class AsyncLetterboxdClient(Endpoints):
+    """Signs and sends Letterboxd API requests over one aiohttp session.
+
+    `limit` caps the total number of open connections, `limit_per_host` the
+    number of connections to a single host (0 means no per-host limit).
+    A `letterboxd_scheduler.Scheduler` can be shared with other clients to
+    rate limit all of them together. As with `LetterboxdClient`,
+    `access_token` may be a string or a `letterboxd_token.TokenManager`,
+    and `clock` a `letterboxd_nonce.ServerClock` correcting the timestamps.
+    A `letterboxd_keys.KeyPool` spreads the requests over several API keys.
+    """
+
+    def __init__(self, api_key, api_secret, base_url=base_url,
+                 limit=100, limit_per_host=0, timeout=None, scheduler=None, clock=None, key_pool=None):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.signer = Signer(api_secret) if api_secret is not None else None
+        self.base_url = base_url
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.scheduler = scheduler
+        self.clock = clock or ServerClock()
+        self.key_pool = key_pool
+        self.session = None
+
+    @classmethod
+    def from_input(cls, **kwargs):
+        # retrieve your Letterboxd API Key and API Secret
+        api_key = input('API Key: ')
+        api_secret = getpass('API Secret: ')
+
+        return cls(api_key, api_secret, **kwargs)
+
+    async def open(self):
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+
+        return self
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def prepare(self, method, path, params=None, data=None, headers=None, access_token=None, credential=None):
+        # define request headers as specified here http://api-docs.letterboxd.com/#auth
+        request_headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+        if headers:
+            request_headers.update(headers)
+        if access_token is not None:
+            request_headers['Authorization'] = 'Bearer ' + access_token
+
+        # define request GET parameters, unique for every request
+        request_params = {
+            'apikey': self.api_key if credential is None else credential.api_key,
+            'nonce': nonces.next(),
+            'timestamp': self.clock.timestamp()
+        }
+        if params:
+            request_params.update(params)
+
+        # encode the URL and body the same way `requests` prepares them
+        url = self.base_url + path + '?' + urlencode(request_params, doseq=True)
+
+        if data is None:
+            body = ''
+        elif isinstance(data, dict):
+            body = urlencode(data, doseq=True)
+        else:
+            body = data
+
+        # create the signature to be sent with the request, recreated for every
+        # request as specified here http://api-docs.letterboxd.com/#signing
+        signer = self.signer if credential is None else credential.signer
+        url = signer.sign_url(method.upper(), url, body)
+
+        return method.upper(), url, body, request_headers
+
+    async def request(self, method, path, params=None, data=None, headers=None, access_token=None):
+        await self.open()
+
+        async def attempt(token, exclude=None):
+            # a throttled key hands the request on to another key, once per key; the last 429 is
+            # returned, for the scheduler to retry and back off as usual
+            handovers = len(self.key_pool) - 1 if self.key_pool is not None else 0
+
+            while True:
+                credential = None
+                if self.key_pool is not None:
+                    credential, delay = self.key_pool.reserve(exclude)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+
+                # prepared (and so signed) again on every attempt, each with a new nonce and timestamp
+                prepared_method, url, body, request_headers = self.prepare(method, path, params=params, data=data,
+                                                                           headers=headers, access_token=token,
+                                                                           credential=credential)
+
+                # the URL is already encoded and signed, it must be sent byte for byte
+                sent_at = time.time()
+                async with self.session.request(prepared_method, URL(url, encoded=True), data=body or None,
+                                                headers=request_headers) as response:
+                    content = await response.read()
+                    response = AsyncResponse(response.status, response.headers, content)
+                self.clock.observe(response.headers.get('Date'), sent_at, time.time())
+
+                if credential is None or not self.key_pool.report(credential, response) or handovers == 0:
+                    return response, credential
+
+                # the key was set aside, another one takes over the request
+                handovers -= 1
+
+        async def send_once(token):
+            offset = self.clock.offset
+            response, credential = await attempt(token)
+
+            if response.status_code == 401 and self.clock.moved(offset):
+                # signed with a timestamp the server clock has since shown to be off, sign it again
+                response, credential = await attempt(token)
+
+            if (response.status_code == 401 and token is None and credential is not None
+                    and self.key_pool.active(exclude=credential)):
+                # the key is only to blame if another key gets the same request through
+                response, _ = await attempt(token, exclude=credential)
+                if response.status_code != 401:
+                    self.key_pool.reject(credential)
+
+            return response
+
+        async def send():
+            if not hasattr(access_token, 'atoken'):
+                return await send_once(access_token)
+
+            token = await access_token.atoken()
+            response = await send_once(token)
+
+            if response.status_code == 401:
+                # the token was revoked or expired early, retry once with a new one
+                access_token.invalidate(token)
+                response = await send_once(await access_token.atoken())
+
+            return response
+
+        if self.scheduler is None:
+            return await send()
+
+        return await self.scheduler.aexecute(send)
+
+    async def gather(self, awaitables, concurrency=100, return_exceptions=False):
+        """Await `awaitables` with at most `concurrency` of them running at once."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(awaitable):
+            async with semaphore:
+                return await awaitable
+
+        return await asyncio.gather(*[bounded(awaitable) for awaitable in awaitables],
+                                    return_exceptions=return_exceptions)
+
+    async def map(self, function, iterable, concurrency=100, return_exceptions=False):
+        """Call `function(item)` for every item, `concurrency` requests at a time.
+
+        Requests are only created (and therefore signed) once a slot is free,
+        so the timestamps never go stale while waiting in the queue.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(item):
+            async with semaphore:
+                return await function(item)
+
+        return await asyncio.gather(*[bounded(item) for item in iterable],
+                                    return_exceptions=return_exceptions)
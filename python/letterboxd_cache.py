@@ -0,0 +1,247 @@
+"""
+Persistent response cache for reference endpoints
+http://api-docs.letterboxd.com/#path--films-genres
+http://api-docs.letterboxd.com/#path--films-film-services
+http://api-docs.letterboxd.com/#path--contributor--id-
+http://api-docs.letterboxd.com/#path--film--id-
+
+The genre and film-service lists almost never change, yet `films_genres.py`
+and `films_film-services.py` fetch and parse them on every run.
+`ResponseCache` keeps decoded responses in an in-process LRU in front of a
+SQLite file. Entries are fresh for `ttl` seconds; after that the stored
+`ETag`/`Last-Modified` validators are sent along and a `304 Not Modified`
+only refreshes the entry's age.
+
+Entries are keyed by the URL that gets signed, less the `apikey`, `nonce`,
+`timestamp` and `signature` params that change from one request to the
+next. With `ttl=0` every call is a conditional GET, so refreshing a large
+set of contributors or films (`film_id`) mostly moves headers.
+
+Python 3:
+>>> from letterboxd_client import LetterboxdClient
+>>> from letterboxd_cache import ResponseCache, contributor_id, films_genres
+>>> cache = ResponseCache('letterboxd-cache.sqlite3', ttl=7 * 24 * 3600)
+>>> with LetterboxdClient(api_key, api_secret) as client:
+...     genres = films_genres(client, cache)
+
+>>> cache = ResponseCache('contributors.sqlite3', ttl=0)
+>>> contributor = contributor_id(client, cache, '2tn5')
+>>> cache.metrics()
+
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from letterboxd_client import LetterboxdError
+
+# query params that are different on every signed request of the same resource
+volatile_params = ('apikey', 'nonce', 'timestamp', 'signature')
+
+
+def resource_key(url):
+    """`url` without its volatile params and with the others in a stable order."""
+    split = urlsplit(url)
+    params = [(name, value) for name, value in parse_qsl(split.query, keep_blank_values=True)
+              if name not in volatile_params]
+
+    return urlunsplit(split._replace(query=urlencode(sorted(params)), fragment=''))
+
+
+class CacheEntry:
+    __slots__ = ('value', 'body', 'etag', 'last_modified', 'stored_at')
+
+    def __init__(self, value, body, etag, last_modified, stored_at):
+        self.value = value
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+
+
+class ResponseCache:
+    """Decoded JSON responses, kept in memory and in a SQLite file.
+
+    `path` is the SQLite database file (`':memory:'` keeps nothing on disk),
+    `ttl` the number of seconds an entry is served without asking the API
+    (0 revalidates on every call), and `lru_size` the number of decoded
+    entries kept in process.
+    """
+
+    def __init__(self, path=':memory:', ttl=24 * 3600, lru_size=128):
+        self.ttl = ttl
+        self.lru_size = lru_size
+        self.lru = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.fresh = 0
+        self.not_modified = 0
+        self.downloaded = 0
+
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        # a revalidation commits once per resource, which must not cost an fsync each
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            ' key TEXT PRIMARY KEY,'
+            ' body BLOB NOT NULL,'
+            ' etag TEXT,'
+            ' last_modified TEXT,'
+            ' stored_at REAL NOT NULL)'
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    @staticmethod
+    def key(client, path, params=None):
+        # the URL `client` would sign for GET `path`, before the volatile params are added
+        url = client.base_url + path
+        if params:
+            url += '?' + urlencode(params, doseq=True)
+
+        return resource_key(url)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.lru.get(key)
+            if entry is not None:
+                self.lru.move_to_end(key)
+                return entry
+
+            row = self.db.execute(
+                'SELECT body, etag, last_modified, stored_at FROM responses WHERE key = ?', (key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        body, etag, last_modified, stored_at = row
+        entry = CacheEntry(json.loads(body), body, etag, last_modified, stored_at)
+        self._remember(key, entry)
+
+        return entry
+
+    def put(self, key, body, etag=None, last_modified=None):
+        entry = CacheEntry(json.loads(body), body, etag, last_modified, time.time())
+
+        with self.lock:
+            self.db.execute(
+                'INSERT OR REPLACE INTO responses (key, body, etag, last_modified, stored_at) VALUES (?, ?, ?, ?, ?)',
+                (key, body, etag, last_modified, entry.stored_at)
+            )
+            self.db.commit()
+        self._remember(key, entry)
+
+        return entry
+
+    def touch(self, key, entry):
+        entry.stored_at = time.time()
+
+        with self.lock:
+            self.db.execute('UPDATE responses SET stored_at = ? WHERE key = ?', (entry.stored_at, key))
+            self.db.commit()
+
+    def _remember(self, key, entry):
+        with self.lock:
+            self.lru[key] = entry
+            self.lru.move_to_end(key)
+            while len(self.lru) > self.lru_size:
+                self.lru.popitem(last=False)
+
+    def is_fresh(self, entry):
+        return time.time() - entry.stored_at < self.ttl
+
+    def _conditional_headers(self, entry):
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+
+        return headers
+
+    def metrics(self):
+        with self.lock:
+            return {'fresh': self.fresh, 'not_modified': self.not_modified, 'downloaded': self.downloaded}
+
+    def _count(self, outcome):
+        with self.lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def _store_response(self, key, entry, response, content):
+        if response.status_code == 304 and entry is not None:
+            self._count('not_modified')
+            self.touch(key, entry)
+            return entry.value
+
+        if response.status_code != 200:
+            raise LetterboxdError(response)
+
+        self._count('downloaded')
+
+        return self.put(key, content, response.headers.get('ETag'), response.headers.get('Last-Modified')).value
+
+    def get_json(self, client, path, params=None):
+        """Decoded JSON of GET `path`, from the cache when fresh."""
+        key = self.key(client, path, params)
+        entry = self.get(key)
+        if entry is not None and self.is_fresh(entry):
+            self._count('fresh')
+            return entry.value
+
+        response = client.request('get', path, params=params, headers=self._conditional_headers(entry))
+
+        return self._store_response(key, entry, response, response.content)
+
+    async def aget_json(self, client, path, params=None):
+        """Async counterpart of `get_json` for `AsyncLetterboxdClient`."""
+        key = self.key(client, path, params)
+        entry = self.get(key)
+        if entry is not None and self.is_fresh(entry):
+            self._count('fresh')
+            return entry.value
+
+        response = await client.request('get', path, params=params, headers=self._conditional_headers(entry))
+
+        return self._store_response(key, entry, response, response.content)
+
+
+# GET /contributor/{id}
+def contributor_id(client, cache, contributor_id):
+    return cache.get_json(client, '/contributor/' + contributor_id)
+
+
+# GET /contributor/{id}/contributions
+def contributor_id_contributions(client, cache, contributor_id, **params):
+    # see here for the allowed params http://api-docs.letterboxd.com/#/definitions/FilmContributionsRequest
+    return cache.get_json(client, '/contributor/' + contributor_id + '/contributions', params)
+
+
+# GET /film/{id}
+def film_id(client, cache, film_id):
+    # `film_id` may also be an `imdb:` or `tmdb:` prefixed ID, each cached under its own URL
+    return cache.get_json(client, '/film/' + film_id)
+
+
+# GET /films
+def films(client, cache, **params):
+    # see here for the allowed params http://api-docs.letterboxd.com/#/definitions/FilmsRequest
+    return cache.get_json(client, '/films', params)
+
+
+# GET /films/genres
+def films_genres(client, cache):
+    return cache.get_json(client, '/films/genres')
+
+
+# GET /films/film-services
+def films_film_services(client, cache):
+    return cache.get_json(client, '/films/film-services')
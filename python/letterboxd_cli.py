@@ -0,0 +1,215 @@
+"""
+One command line entry point for every example endpoint
+
+Replaces running the separate scripts: each subcommand only imports its
+handler and `requests`/`json`/signing when it actually runs, so `--help`
+and argument errors don't pay for them. A subcommand that sends a request
+imports `requests` like the scripts do, and starts about as fast as the
+script for the same endpoint (see `benchmark_startup.py`), not faster.
+Credentials are read by `letterboxd_client.load_credentials`;
+bearer-token commands also read `LETTERBOXD_ACCESS_TOKEN` unless
+`--access-token` is given.
+
+Python 3:
+$ python3 ./letterboxd_cli.py contributor 2tn5
+$ python3 ./letterboxd_cli.py contributions 2tn5 --param type=Director --all-pages
+$ python3 ./letterboxd_cli.py search "Pulp Fiction" --param perPage=5
+$ python3 ./letterboxd_cli.py me patch --set bio='I am Iron Man.'
+$ python3 ./letterboxd_cli.py token --username tony
+
+Each response is printed as one line of JSON; with `--all-pages` every item
+of a list endpoint is printed as its own line instead.
+
+"""
+
+import os
+import sys
+from argparse import SUPPRESS, ArgumentParser
+
+
+def _client(args):
+    from letterboxd_client import LetterboxdClient
+
+    return LetterboxdClient.from_config(args.config)
+
+
+def _params(args):
+    params = {}
+    for param in args.param or ():
+        key, _, value = param.partition('=')
+        # repeated parameters, e.g. `--param where=Released --param where=NotReleased`, become lists
+        if key in params:
+            previous = params[key]
+            params[key] = (previous if isinstance(previous, list) else [previous]) + [value]
+        else:
+            params[key] = value
+
+    return params
+
+
+def _access_token(args):
+    access_token = args.access_token or os.environ.get('LETTERBOXD_ACCESS_TOKEN')
+    if not access_token:
+        sys.exit('An access token is required, use --access-token or set LETTERBOXD_ACCESS_TOKEN')
+
+    return access_token
+
+
+def _output(response):
+    if response.status_code == 204:
+        return
+    if response.status_code >= 400:
+        sys.stderr.write('Letterboxd API responded with status {}\n'.format(response.status_code))
+        if response.content:
+            sys.stderr.write(response.text + '\n')
+        sys.exit(1)
+
+    from letterboxd_stream import dumps
+
+    sys.stdout.buffer.write(dumps(response.json()) + b'\n')
+
+
+def _list(args, path, **params):
+    params.update(_params(args))
+
+    with _client(args) as client:
+        if not args.all_pages:
+            return _output(client.request('get', path, params=params))
+
+        from letterboxd_stream import stream_items, write_ndjson
+
+        write_ndjson(stream_items(client, path, **params), sys.stdout)
+
+
+def me_get(args):
+    with _client(args) as client:
+        _output(client.me_get(_access_token(args)))
+
+
+def me_patch(args):
+    import json
+
+    # see here for the allowed values http://api-docs.letterboxd.com/#/definitions/MemberSettingsUpdateRequest
+    body = {}
+    for setting in args.set or ():
+        key, _, value = setting.partition('=')
+        try:
+            body[key] = json.loads(value)
+        except ValueError:
+            body[key] = value
+
+    with _client(args) as client:
+        _output(client.me_patch(body, _access_token(args)))
+
+
+def me_validation_request(args):
+    with _client(args) as client:
+        _output(client.me_validation_request(_access_token(args)))
+
+
+def search(args):
+    _list(args, '/search', input=args.input)
+
+
+def news(args):
+    _list(args, '/news')
+
+
+def contributor(args):
+    with _client(args) as client:
+        _output(client.contributor_id(args.id))
+
+
+def contributions(args):
+    _list(args, '/contributor/' + args.id + '/contributions')
+
+
+def genres(args):
+    with _client(args) as client:
+        _output(client.films_genres())
+
+
+def services(args):
+    with _client(args) as client:
+        _output(client.films_film_services())
+
+
+def token(args):
+    from getpass import getpass
+
+    with _client(args) as client:
+        if args.refresh_token:
+            _output(client.auth_token_refresh(args.refresh_token))
+        else:
+            username = args.username or input('Username or email address: ')
+            _output(client.auth_token_generate(username, getpass('Password: ')))
+
+
+def username_check(args):
+    with _client(args) as client:
+        _output(client.auth_username_check(args.username))
+
+
+def forgotten_password(args):
+    with _client(args) as client:
+        _output(client.auth_forgotten_password_request(args.email_address))
+
+
+def parser():
+    parser = ArgumentParser(prog='letterboxd', description='Letterboxd API examples.')
+    parser.add_argument('--config', help='INI file with the API Key and API Secret.')
+    commands = parser.add_subparsers(dest='command', metavar='command', required=True)
+
+    def command(name, handler, help, list_endpoint=False):
+        subparser = commands.add_parser(name, help=help)
+        subparser.set_defaults(handler=handler)
+        if list_endpoint:
+            subparser.add_argument('--param', action='append', metavar='KEY=VALUE',
+                                   help='Additional GET parameter (repeatable).')
+            subparser.add_argument('--all-pages', action='store_true', dest='all_pages',
+                                   help='Follow the cursor and print every item as NDJSON.')
+        return subparser
+
+    # accepted before and after the `me` subcommand; SUPPRESS keeps the subcommand from resetting it to None
+    access_token = ArgumentParser(add_help=False)
+    access_token.add_argument('--access-token', dest='access_token', default=SUPPRESS,
+                              help='Bearer token from `token`.')
+
+    me = commands.add_parser('me', help='GET/PATCH /me and POST /me/validation-request.')
+    me.add_argument('--access-token', dest='access_token', help='Bearer token from `token`.')
+    me_commands = me.add_subparsers(dest='me_command', metavar='command', required=True)
+    me_commands.add_parser('get', help='GET /me', parents=[access_token]).set_defaults(handler=me_get)
+    patch = me_commands.add_parser('patch', help='PATCH /me', parents=[access_token])
+    patch.add_argument('--set', action='append', metavar='KEY=VALUE',
+                       help='Setting to change; VALUE is parsed as JSON when possible (repeatable).')
+    patch.set_defaults(handler=me_patch)
+    me_commands.add_parser('validation-request', help='POST /me/validation-request',
+                           parents=[access_token]).set_defaults(
+        handler=me_validation_request)
+
+    command('search', search, 'GET /search', list_endpoint=True).add_argument('input')
+    command('news', news, 'GET /news', list_endpoint=True)
+    command('contributor', contributor, 'GET /contributor/{id}').add_argument('id')
+    command('contributions', contributions, 'GET /contributor/{id}/contributions',
+            list_endpoint=True).add_argument('id')
+    command('genres', genres, 'GET /films/genres')
+    command('services', services, 'GET /films/film-services')
+
+    token_parser = command('token', token, 'POST /auth/token')
+    token_parser.add_argument('--username')
+    token_parser.add_argument('--refresh-token', dest='refresh_token')
+
+    command('username-check', username_check, 'GET /auth/username-check').add_argument('username')
+    command('forgotten-password', forgotten_password,
+            'POST /auth/forgotten-password-request').add_argument('email_address')
+
+    return parser
+
+
+def main(argv=None):
+    args = parser().parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
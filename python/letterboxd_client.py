@@ -0,0 +1,373 @@
+"""
+Reusable Letterboxd API client
+http://api-docs.letterboxd.com/#signing
+
+Every example script creates a fresh `requests.Session()` per call, which
+means a new TCP+TLS handshake for every request. `LetterboxdClient` keeps a
+single pooled, keep-alive session around and exposes every example endpoint
+as a method, signing each request exactly like the scripts do.
+
+Python 3:
+>>> from letterboxd_client import LetterboxdClient
+>>> with LetterboxdClient(api_key, api_secret) as client:
+...     response = client.contributor_id('2tn5')
+...     print(response.json())
+
+"""
+
+import requests
+import json
+import os
+import time
+from configparser import ConfigParser
+from getpass import getpass
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from letterboxd_hooks import InstrumentedAdapter, RequestTimer
+from letterboxd_nonce import ServerClock, nonces
+from letterboxd_signing import Signer
+
+base_url = 'https://api.letterboxd.com/api/v0'
+
+default_config_path = os.path.join('~', '.letterboxd.ini')
+
+
+def load_credentials(config_path=None):
+    """Return `(api_key, api_secret)` from the environment or a config file.
+
+    `LETTERBOXD_API_KEY` and `LETTERBOXD_API_SECRET` take precedence over the
+    `api_key`/`api_secret` options in the `[letterboxd]` section of the INI
+    file at `config_path` (default `~/.letterboxd.ini`).
+    """
+    config = ConfigParser()
+    config.read(os.path.expanduser(config_path or default_config_path))
+
+    api_key = os.environ.get('LETTERBOXD_API_KEY') or config.get('letterboxd', 'api_key', fallback=None)
+    api_secret = os.environ.get('LETTERBOXD_API_SECRET') or config.get('letterboxd', 'api_secret', fallback=None)
+
+    if not api_key or not api_secret:
+        raise ValueError('Set LETTERBOXD_API_KEY and LETTERBOXD_API_SECRET, '
+                         'or api_key and api_secret in the [letterboxd] section of ' +
+                         (config_path or default_config_path))
+
+    return api_key, api_secret
+
+
+class LetterboxdError(Exception):
+    """Raised by the client helpers when the API answers with an unexpected status."""
+
+    def __init__(self, response):
+        super().__init__('Letterboxd API responded with status {}'.format(response.status_code))
+        self.response = response
+        self.status_code = response.status_code
+
+
+class Endpoints:
+    """Every example endpoint, expressed in terms of `self.request(...)`.
+
+    Shared by the blocking and the asyncio client; on the latter every
+    method returns an awaitable. Endpoints that need an authenticated member
+    fall back to the client's `token_manager` when no access token is given.
+    """
+
+    token_manager = None
+
+    # POST /auth/forgotten-password-request
+    def auth_forgotten_password_request(self, email_address):
+        # define request body as specified here http://api-docs.letterboxd.com/#/definitions/ForgottenPasswordRequest
+        body = json.dumps({'emailAddress': email_address})
+
+        return self.request('post', '/auth/forgotten-password-request', data=body)
+
+    # POST /auth/token
+    def auth_token_generate(self, username, password):
+        # define request body as specified here http://api-docs.letterboxd.com/#auth
+        body = {
+            'grant_type': 'password',
+            'username': username,
+            'password': password
+        }
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+        return self.request('post', '/auth/token', data=body, headers=headers)
+
+    # POST /auth/token
+    def auth_token_refresh(self, refresh_token):
+        # define request body as specified here http://api-docs.letterboxd.com/#auth
+        body = {
+            'grant_type': 'refresh_token',
+            'refresh_token': refresh_token
+        }
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'}
+
+        return self.request('post', '/auth/token', data=body, headers=headers)
+
+    # GET /auth/username-check
+    def auth_username_check(self, username):
+        return self.request('get', '/auth/username-check', params={'username': username})
+
+    # GET /contributor/{id}
+    def contributor_id(self, contributor_id):
+        return self.request('get', '/contributor/' + contributor_id)
+
+    # GET /contributor/{id}/contributions
+    def contributor_id_contributions(self, contributor_id, **params):
+        # see here for the allowed params http://api-docs.letterboxd.com/#/definitions/FilmContributionsRequest
+        return self.request('get', '/contributor/' + contributor_id + '/contributions', params=params)
+
+    # GET /film/{id}
+    def film_id(self, film_id):
+        return self.request('get', '/film/' + film_id)
+
+    # GET /films
+    def films(self, **params):
+        # see here for the allowed params http://api-docs.letterboxd.com/#/definitions/FilmsRequest
+        return self.request('get', '/films', params=params)
+
+    # GET /films/film-services
+    def films_film_services(self):
+        return self.request('get', '/films/film-services')
+
+    # GET /films/genres
+    def films_genres(self):
+        return self.request('get', '/films/genres')
+
+    # GET /me
+    def me_get(self, access_token=None):
+        return self.request('get', '/me', access_token=access_token or self.token_manager)
+
+    # PATCH /me
+    def me_patch(self, body, access_token=None):
+        # see here for the allowed body properties http://api-docs.letterboxd.com/#/definitions/MemberSettingsUpdateRequest
+        return self.request('patch', '/me', data=json.dumps(body), access_token=access_token or self.token_manager)
+
+    # POST /me/validation-request
+    def me_validation_request(self, access_token=None):
+        return self.request('post', '/me/validation-request', access_token=access_token or self.token_manager)
+
+    # GET /news
+    def news(self, **params):
+        # see here for the allowed params http://api-docs.letterboxd.com/#/definitions/NewsRequest
+        return self.request('get', '/news', params=params)
+
+    # GET /search
+    def search(self, search_input, **params):
+        # see here for the allowed params http://api-docs.letterboxd.com/#/definitions/SearchRequest
+        params['input'] = search_input
+
+        return self.request('get', '/search', params=params)
+
+
+class LetterboxdClient(Endpoints):
+    """Signs and sends Letterboxd API requests over one pooled session.
+
+    `pool_connections` is the number of per-host connection pools kept
+    around, `pool_maxsize` the number of keep-alive connections kept per
+    host. With `pool_block=True` no more than `pool_maxsize` connections are
+    ever opened to a single host; callers wait for a free one instead.
+
+    Pass a `letterboxd_scheduler.Scheduler` to rate limit every request and
+    retry throttled ones. `access_token` may be a token string or a
+    `letterboxd_token.TokenManager`, which is asked for a current token on
+    every attempt. `hooks` are `letterboxd_hooks.Hook` instances that
+    receive per-phase timings of every request.
+
+    Timestamps are corrected by a `letterboxd_nonce.ServerClock`, which
+    learns the server's clock offset from the responses; a request rejected
+    with a timestamp the clock has since been corrected for is sent again.
+
+    With a `letterboxd_keys.KeyPool` every request is signed with the key
+    that has the most budget left, instead of `api_key`/`api_secret`.
+    `transport` replaces the pooled HTTP/1.1 adapter with another `requests`
+    transport adapter, such as `letterboxd_transport.HTTP2Adapter`.
+
+    Responses are asked for in any `accept_encoding` the installed decoders
+    can undo (gzip and deflate, plus br and zstd when `brotli` and
+    `zstandard` are installed); pass `'identity'` to turn compression off.
+    """
+
+    def __init__(self, api_key, api_secret, base_url=base_url,
+                 pool_connections=10, pool_maxsize=10, pool_block=False,
+                 timeout=None, scheduler=None, hooks=(), clock=None, key_pool=None, transport=None,
+                 accept_encoding=ACCEPT_ENCODING):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.signer = Signer(api_secret) if api_secret is not None else None
+        self.base_url = base_url
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.hooks = list(hooks)
+        self.clock = clock or ServerClock()
+        self.key_pool = key_pool
+        self.pool_maxsize = pool_maxsize
+
+        self.session = requests.Session()
+        self.session.params = {}
+        self.session.headers['Accept-Encoding'] = accept_encoding
+
+        if transport is None:
+            # connection set-up is only timed when somebody is listening
+            adapter_class = InstrumentedAdapter if self.hooks else HTTPAdapter
+            transport = adapter_class(pool_connections=pool_connections,
+                                      pool_maxsize=pool_maxsize,
+                                      pool_block=pool_block)
+        self.session.mount('https://', transport)
+        self.session.mount('http://', transport)
+
+    @classmethod
+    def from_input(cls, **kwargs):
+        # retrieve your Letterboxd API Key and API Secret
+        api_key = input('API Key: ')
+        api_secret = getpass('API Secret: ')
+
+        return cls(api_key, api_secret, **kwargs)
+
+    @classmethod
+    def from_config(cls, config_path=None, **kwargs):
+        api_key, api_secret = load_credentials(config_path)
+
+        # e.g. point non-interactive tools at `mock_server.py`
+        if os.environ.get('LETTERBOXD_BASE_URL'):
+            kwargs.setdefault('base_url', os.environ['LETTERBOXD_BASE_URL'])
+
+        return cls(api_key, api_secret, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def prepare(self, method, path, params=None, data=None, headers=None, access_token=None, timer=None,
+                credential=None):
+        url = self.base_url + path
+
+        # define request headers as specified here http://api-docs.letterboxd.com/#auth
+        request_headers = {
+            'Content-Type': 'application/json',
+            'Accept': 'application/json'
+        }
+        if headers:
+            request_headers.update(headers)
+        if access_token is not None:
+            request_headers['Authorization'] = 'Bearer ' + access_token
+
+        # define request GET parameters, unique for every request
+        request_params = {
+            'apikey': self.api_key if credential is None else credential.api_key,
+            'nonce': nonces.next(),
+            'timestamp': self.clock.timestamp()
+        }
+        if params:
+            request_params.update(params)
+
+        # prepare the request
+        request = requests.Request(method.upper(), url, data=data, params=request_params, headers=request_headers)
+        prepared_request = self.session.prepare_request(request)
+
+        signer = self.signer if credential is None else credential.signer
+        if timer is None:
+            self.sign(prepared_request, signer)
+        else:
+            timer.phases['prepare'] += time.perf_counter() - timer.started
+            with timer.time('sign'):
+                self.sign(prepared_request, signer)
+
+        return prepared_request
+
+    def sign(self, prepared_request, signer=None):
+        if prepared_request.body is None:
+            encodable_body = ''
+        else:
+            encodable_body = prepared_request.body
+
+        # create the signature to be sent with the request, recreated for every
+        # request as specified here http://api-docs.letterboxd.com/#signing
+        # and append it as the final query parameter of the already prepared URL
+        signer = signer or self.signer
+        prepared_request.url = signer.sign_url(prepared_request.method, prepared_request.url, encodable_body)
+
+    def request(self, method, path, params=None, data=None, headers=None, access_token=None, stream=False):
+        timer = RequestTimer(self.hooks, method, path) if self.hooks else None
+
+        def attempt(token, exclude=None):
+            # a throttled key hands the request on to another key, once per key; the last 429 is
+            # returned, for the scheduler to retry and back off as usual
+            handovers = len(self.key_pool) - 1 if self.key_pool is not None else 0
+
+            while True:
+                credential = None
+                if self.key_pool is not None:
+                    credential, delay = self.key_pool.reserve(exclude)
+                    if delay > 0:
+                        time.sleep(delay)
+
+                if timer is not None:
+                    timer.started = time.perf_counter()
+
+                # prepared (and so signed) again on every attempt, each with a new nonce and timestamp
+                prepared_request = self.prepare(method, path, params=params, data=data, headers=headers,
+                                                access_token=token, timer=timer, credential=credential)
+
+                # send the request over the pooled connection
+                sent_at = time.time()
+                if timer is not None:
+                    response = timer.send(self.session, prepared_request, timeout=self.timeout, stream=stream)
+                else:
+                    response = self.session.send(prepared_request, timeout=self.timeout, stream=stream)
+                self.clock.observe(response.headers.get('Date'), sent_at, time.time())
+
+                if credential is None or not self.key_pool.report(credential, response) or handovers == 0:
+                    return response, credential
+
+                # the key was set aside, another one takes over the request
+                handovers -= 1
+                response.close()
+
+        def send_once(token):
+            offset = self.clock.offset
+            response, credential = attempt(token)
+
+            if response.status_code == 401 and self.clock.moved(offset):
+                # signed with a timestamp the server clock has since shown to be off, sign it again
+                response.close()
+                response, credential = attempt(token)
+
+            if (response.status_code == 401 and token is None and credential is not None
+                    and self.key_pool.active(exclude=credential)):
+                # the key is only to blame if another key gets the same request through
+                response.close()
+                response, _ = attempt(token, exclude=credential)
+                if response.status_code != 401:
+                    self.key_pool.reject(credential)
+
+            return response
+
+        def send():
+            if not hasattr(access_token, 'token'):
+                return send_once(access_token)
+
+            token = access_token.token()
+            response = send_once(token)
+
+            if response.status_code == 401:
+                # the token was revoked or expired early, retry once with a new one
+                access_token.invalidate(token)
+                response.close()
+                response = send_once(access_token.token())
+
+            return response
+
+        if self.scheduler is None:
+            response = send()
+        else:
+            response = self.scheduler.execute(send)
+
+        if timer is not None:
+            timer.finish(response)
+
+        return response
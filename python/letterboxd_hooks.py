@@ -0,0 +1,348 @@
+"""
+Per-phase timing hooks for the request hot path
+
+Every request goes through the same steps: build the params and prepare
+the request, sign it, connect, wait for the first byte, download the body
+and decode the JSON. Pass `hooks=[...]` to `LetterboxdClient` to have each
+of those phases timed and reported, together with byte counts and the
+number of retries, to one or more hooks:
+
+* `PrometheusHook` aggregates counters and histograms and renders them in
+  the Prometheus text exposition format.
+* `LogHook` writes one structured (JSON) log record per request.
+* `TransferHook` adds up wire and decoded body bytes per endpoint, to show
+  what compression saves.
+
+Custom hooks subclass `Hook` and override `request`, `decode` and/or
+`transfer`.
+
+Python 3:
+>>> from letterboxd_client import LetterboxdClient
+>>> from letterboxd_hooks import PrometheusHook
+>>> metrics = PrometheusHook()
+>>> client = LetterboxdClient(api_key, api_secret, hooks=[metrics])
+>>> client.contributor_id('2tn5').json()
+>>> print(metrics.render())
+
+"""
+
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+phases = ('prepare', 'sign', 'connect', 'ttfb', 'download', 'decode')
+
+# path segments followed by an identifier, collapsed so metrics don't get a label per ID
+_collections = {'contributor', 'film', 'film-collection', 'list', 'log-entry', 'member', 'comment', 'story'}
+
+_connect_times = threading.local()
+
+
+def wire_bytes(response, default=0):
+    """Body bytes `response` took on the wire, before `Content-Encoding` was undone."""
+    # urllib3 responses (and the HTTP/2 adapter's) count the bytes read off the connection
+    tell = getattr(response.raw, 'tell', None)
+
+    return tell() if tell is not None else default
+
+
+def endpoint_name(method, path):
+    segments = path.strip('/').split('/')
+    for index in range(1, len(segments)):
+        if segments[index - 1] in _collections:
+            segments[index] = '{id}'
+
+    return method.upper() + ' /' + '/'.join(segments)
+
+
+class _TimedConnect:
+    # connect() covers name resolution, the TCP handshake and, for HTTPS, the TLS handshake
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            _connect_times.elapsed = getattr(_connect_times, 'elapsed', 0.0) + time.perf_counter() - start
+
+
+class _TimedHTTPConnection(_TimedConnect, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnect, HTTPSConnection):
+    pass
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class InstrumentedAdapter(HTTPAdapter):
+    """`HTTPAdapter` whose connections record how long connecting took."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+
+class Hook:
+    """Receives the measurements of every request; override what you need."""
+
+    def request(self, event):
+        """Called once per request with a dict holding `endpoint`, `status`,
+        `phases` (seconds per phase, summed over retries), `request_bytes`,
+        `response_bytes`, `response_wire_bytes` and `retries`. The body
+        sizes of streamed responses are only known once they have been read
+        and are left out here; see `transfer`."""
+
+    def decode(self, endpoint, seconds):
+        """Called every time a response body is decoded with `.json()`."""
+
+    def transfer(self, endpoint, wire_bytes, decoded_bytes):
+        """Called once per response body read, streamed or not, with its size
+        on the wire and after decompression."""
+
+
+class RequestTimer:
+    """Collects the phase timings of one client request, across retries."""
+
+    def __init__(self, hooks, method, path):
+        self.hooks = hooks
+        self.endpoint = endpoint_name(method, path)
+        self.phases = dict.fromkeys(phases[:-1], 0.0)
+        self.attempts = 0
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.response_wire_bytes = 0
+
+    @contextmanager
+    def time(self, phase):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[phase] += time.perf_counter() - start
+
+    def send(self, session, prepared_request, stream=False, **kwargs):
+        self.attempts += 1
+        _connect_times.elapsed = 0.0
+
+        start = time.perf_counter()
+        response = session.send(prepared_request, stream=stream, **kwargs)
+        total = time.perf_counter() - start
+
+        # `elapsed` runs from sending the request until the response headers were parsed
+        connect = _connect_times.elapsed
+        headers_received = response.elapsed.total_seconds()
+        self.phases['connect'] += connect
+        self.phases['ttfb'] += max(0.0, headers_received - connect)
+
+        body = prepared_request.body
+        self.request_bytes += len(body) if body else 0
+        if stream:
+            self._count_stream(response)
+        else:
+            self.phases['download'] += max(0.0, total - headers_received)
+            decoded = len(response.content)
+            wire = wire_bytes(response, decoded)
+            self.response_bytes += decoded
+            self.response_wire_bytes += wire
+            for hook in self.hooks:
+                hook.transfer(self.endpoint, wire, decoded)
+
+        self._time_decode(response)
+
+        return response
+
+    def _count_stream(self, response):
+        # count the decoded bytes as they are read and report both sizes when the response is closed
+        hooks, endpoint, raw, close = self.hooks, self.endpoint, response.raw, response.close
+        decoded = 0
+        reported = False
+
+        def counted(read):
+            def counting_read(*args, **kwargs):
+                nonlocal decoded
+                data = read(*args, **kwargs)
+                decoded += len(data)
+                return data
+
+            return counting_read
+
+        def counted_chunks(read_chunked):
+            def counting_read_chunked(*args, **kwargs):
+                nonlocal decoded
+                for data in read_chunked(*args, **kwargs):
+                    decoded += len(data)
+                    yield data
+
+            return counting_read_chunked
+
+        def reporting_close():
+            nonlocal reported
+            if not reported:
+                reported = True
+                wire = wire_bytes(response, decoded)
+                for hook in hooks:
+                    hook.transfer(endpoint, wire, decoded)
+            close()
+
+        raw.read = counted(raw.read)
+        if hasattr(raw, 'read_chunked'):
+            # urllib3 reads chunked bodies without going through `read`
+            raw.read_chunked = counted_chunks(raw.read_chunked)
+        response.close = reporting_close
+
+    def _time_decode(self, response):
+        hooks, endpoint, decode = self.hooks, self.endpoint, response.json
+
+        def timed_json(**kwargs):
+            start = time.perf_counter()
+            try:
+                return decode(**kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                for hook in hooks:
+                    hook.decode(endpoint, elapsed)
+
+        response.json = timed_json
+
+    def finish(self, response):
+        event = {
+            'endpoint': self.endpoint,
+            'status': response.status_code,
+            'phases': self.phases,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'response_wire_bytes': self.response_wire_bytes,
+            'retries': max(0, self.attempts - 1)
+        }
+        for hook in self.hooks:
+            hook.request(event)
+
+
+class PrometheusHook(Hook):
+    """Counters and per-phase latency histograms in Prometheus text format."""
+
+    buckets = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, prefix='letterboxd'):
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.counters = {}
+
+    def _count(self, name, labels, value=1):
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def _observe(self, labels, seconds):
+        histogram = self.histograms.get(labels)
+        if histogram is None:
+            histogram = self.histograms[labels] = [[0] * len(self.buckets), 0, 0.0]
+        for index, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                histogram[0][index] += 1
+        histogram[1] += 1
+        histogram[2] += seconds
+
+    def request(self, event):
+        endpoint = event['endpoint']
+        with self.lock:
+            for phase, seconds in event['phases'].items():
+                self._observe((endpoint, phase), seconds)
+            self._count('requests_total', (('endpoint', endpoint), ('status', str(event['status']))))
+            self._count('request_bytes_total', (('endpoint', endpoint),), event['request_bytes'])
+            self._count('retries_total', (('endpoint', endpoint),), event['retries'])
+
+    def decode(self, endpoint, seconds):
+        with self.lock:
+            self._observe((endpoint, 'decode'), seconds)
+
+    def transfer(self, endpoint, wire_bytes, decoded_bytes):
+        with self.lock:
+            self._count('response_wire_bytes_total', (('endpoint', endpoint),), wire_bytes)
+            self._count('response_decoded_bytes_total', (('endpoint', endpoint),), decoded_bytes)
+
+    def render(self):
+        lines = []
+        name = self.prefix + '_phase_seconds'
+
+        with self.lock:
+            lines.append('# TYPE {} histogram'.format(name))
+            for (endpoint, phase), (counts, count, total) in sorted(self.histograms.items()):
+                labels = 'endpoint="{}",phase="{}"'.format(endpoint, phase)
+                for bound, bucket_count in zip(self.buckets, counts):
+                    lines.append('{}_bucket{{{},le="{}"}} {}'.format(name, labels, bound, bucket_count))
+                lines.append('{}_bucket{{{},le="+Inf"}} {}'.format(name, labels, count))
+                lines.append('{}_sum{{{}}} {}'.format(name, labels, total))
+                lines.append('{}_count{{{}}} {}'.format(name, labels, count))
+
+            counter_names = sorted(set(counter for counter, _ in self.counters))
+            for counter in counter_names:
+                lines.append('# TYPE {}_{} counter'.format(self.prefix, counter))
+                for (other, labels), value in sorted(self.counters.items()):
+                    if other == counter:
+                        label_text = ','.join('{}="{}"'.format(key, label) for key, label in labels)
+                        lines.append('{}_{}{{{}}} {}'.format(self.prefix, counter, label_text, value))
+
+        return '\n'.join(lines) + '\n'
+
+
+class LogHook(Hook):
+    """Logs every request (and every decode) as one JSON record."""
+
+    def __init__(self, logger=None, level=logging.INFO):
+        self.logger = logger or logging.getLogger('letterboxd')
+        self.level = level
+
+    def request(self, event):
+        self.logger.log(self.level, json.dumps(dict(event, event='request')))
+
+    def decode(self, endpoint, seconds):
+        self.logger.log(self.level, json.dumps({'event': 'decode', 'endpoint': endpoint, 'seconds': seconds}))
+
+    def transfer(self, endpoint, wire_bytes, decoded_bytes):
+        self.logger.log(self.level, json.dumps({'event': 'transfer', 'endpoint': endpoint,
+                                                'wire_bytes': wire_bytes, 'decoded_bytes': decoded_bytes}))
+
+
+class TransferHook(Hook):
+    """Wire vs. decoded response bytes per endpoint."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def transfer(self, endpoint, wire_bytes, decoded_bytes):
+        with self.lock:
+            totals = self.endpoints.setdefault(endpoint, [0, 0, 0])
+            totals[0] += 1
+            totals[1] += wire_bytes
+            totals[2] += decoded_bytes
+
+    def report(self):
+        """Per endpoint: responses, wire and decoded bytes and the fraction saved on the wire."""
+        with self.lock:
+            return {
+                endpoint: {
+                    'responses': responses,
+                    'wire_bytes': wire,
+                    'decoded_bytes': decoded,
+                    'saved': 1 - wire / decoded if decoded else 0.0
+                }
+                for endpoint, (responses, wire, decoded) in sorted(self.endpoints.items())
+            }
@@ -0,0 +1,245 @@
+"""
+Local inverted index over search and contributor results
+http://api-docs.letterboxd.com/#path--search
+
+Matching jobs send the same titles and names to `/search` over and over.
+`SearchIndex` keeps every film and contributor seen in `search`,
+`contributor_id` and `contributor_id_contributions` responses in a SQLite
+file, with a token -> document table that supports exact, prefix and
+fuzzy (edit distance) matching. `cached_search` answers repeat queries from
+the index and only calls the API for queries it has never seen with the
+same params.
+
+Python 3:
+>>> from letterboxd_index import SearchIndex, cached_search
+>>> index = SearchIndex('letterboxd-index.sqlite3')
+>>> index.add_contributions_response(client.contributor_id_contributions('2tn5').json())
+>>> index.query('pulp fict')
+>>> cached_search(client, index, 'Inglourious Basterds')
+
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import unicodedata
+from urllib.parse import urlencode
+
+from letterboxd_client import LetterboxdError
+
+_token_pattern = re.compile(r'\w+')
+
+exact_score = 1.0
+prefix_score = 0.7
+fuzzy_score = 0.5
+
+# the `include` search item types the index holds, see http://api-docs.letterboxd.com/#/definitions/SearchRequest
+indexed_kinds = {'FilmSearchItem': 'film', 'ContributorSearchItem': 'contributor'}
+default_per_page = 20
+
+
+def tokenize(text):
+    # case and accent insensitive word tokens
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(character for character in text if not unicodedata.combining(character))
+
+    return _token_pattern.findall(text.lower())
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance of `a` and `b`, or `limit + 1` once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, character in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (character != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+
+    return previous[-1]
+
+
+class SearchIndex:
+    """Films and contributors by token, stored in a SQLite file."""
+
+    def __init__(self, path=':memory:'):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(
+            'CREATE TABLE IF NOT EXISTS documents ('
+            ' id TEXT PRIMARY KEY, kind TEXT NOT NULL, name TEXT NOT NULL, data TEXT NOT NULL);'
+            'CREATE TABLE IF NOT EXISTS tokens ('
+            ' token TEXT NOT NULL, document TEXT NOT NULL, PRIMARY KEY (token, document)) WITHOUT ROWID;'
+            'CREATE TABLE IF NOT EXISTS queries (query TEXT PRIMARY KEY);'
+        )
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def _add(self, kind, data, names=()):
+        # called with the lock held, inside a transaction
+        tokens = set(tokenize(data['name']))
+        for name in names:
+            tokens.update(tokenize(name))
+
+        self.db.execute('INSERT OR REPLACE INTO documents (id, kind, name, data) VALUES (?, ?, ?, ?)',
+                        (data['id'], kind, data['name'], json.dumps(data)))
+        self.db.executemany('INSERT OR IGNORE INTO tokens (token, document) VALUES (?, ?)',
+                            [(token, data['id']) for token in tokens])
+
+    def _add_film(self, film):
+        self._add('film', film, [film.get('originalName') or ''] + film.get('alternativeNames', []))
+
+    def add_film(self, film):
+        with self.lock, self.db:
+            self._add_film(film)
+
+    def add_contributor(self, contributor):
+        with self.lock, self.db:
+            self._add('contributor', contributor)
+
+    def add_search_response(self, json_response):
+        # one transaction per page
+        with self.lock, self.db:
+            for item in json_response.get('items', []):
+                if 'film' in item:
+                    self._add_film(item['film'])
+                elif 'contributor' in item:
+                    self._add('contributor', item['contributor'])
+
+    def add_contributions_response(self, json_response):
+        with self.lock, self.db:
+            for contribution in json_response.get('items', []):
+                film = contribution['film']
+                self._add_film(film)
+                for director in film.get('directors', []):
+                    self._add('contributor', director)
+
+    def _matches(self, token, fuzzy):
+        # token -> score for every indexed token matching `token`
+        with self.lock:
+            candidates = self.db.execute(
+                'SELECT DISTINCT token FROM tokens WHERE token >= ? AND token < ?', (token, token + '\uffff')
+            ).fetchall()
+        matches = {candidate: exact_score if candidate == token else prefix_score for candidate, in candidates}
+
+        if fuzzy and not matches and len(token) > 2:
+            limit = 1 if len(token) < 6 else 2
+            with self.lock:
+                candidates = self.db.execute(
+                    'SELECT DISTINCT token FROM tokens WHERE token >= ? AND token < ? '
+                    'AND length(token) BETWEEN ? AND ?',
+                    (token[0], token[0] + '\uffff', len(token) - limit, len(token) + limit)
+                ).fetchall()
+            for candidate, in candidates:
+                if edit_distance(token, candidate, limit) <= limit:
+                    matches[candidate] = fuzzy_score
+
+        return matches
+
+    def query(self, text, kind=None, limit=20, fuzzy=True):
+        """Documents matching every token of `text`, best first.
+
+        Returns `(score, kind, data)` tuples. Query tokens also match as a
+        prefix, and with `fuzzy` a token without any exact or prefix match
+        matches tokens within a small edit distance; both score lower.
+        """
+        scores = None
+        for token in tokenize(text):
+            token_scores = {}
+            for match, score in self._matches(token, fuzzy).items():
+                with self.lock:
+                    documents = self.db.execute('SELECT document FROM tokens WHERE token = ?', (match,)).fetchall()
+                for document, in documents:
+                    token_scores[document] = max(token_scores.get(document, 0), score)
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {document: scores[document] + score
+                          for document, score in token_scores.items() if document in scores}
+            if not scores:
+                return []
+
+        if not scores:
+            return []
+
+        # look documents up in batches, staying below SQLite's bound-variable limit
+        documents = list(scores)
+        rows = []
+        with self.lock:
+            for start in range(0, len(documents), 500):
+                batch = documents[start:start + 500]
+                rows += self.db.execute(
+                    'SELECT id, kind, data FROM documents WHERE id IN ({})'.format(','.join('?' * len(batch))),
+                    batch
+                ).fetchall()
+
+        results = [(scores[document], document_kind, json.loads(data))
+                   for document, document_kind, data in rows if kind is None or document_kind == kind]
+        results.sort(key=lambda result: (-result[0], result[2]['name']))
+
+        return results[:limit]
+
+    @staticmethod
+    def query_key(text, params=None):
+        # the query's tokens plus its params, so a different `include` or `perPage` is a different query
+        key = ' '.join(tokenize(text))
+        if params:
+            normalized = sorted((name, sorted(value) if isinstance(value, (list, tuple)) else value)
+                                for name, value in params.items())
+            key += '?' + urlencode(normalized, doseq=True)
+
+        return key
+
+    def seen_query(self, text, params=None):
+        with self.lock:
+            row = self.db.execute('SELECT 1 FROM queries WHERE query = ?', (self.query_key(text, params),)).fetchone()
+
+        return row is not None
+
+    def add_query(self, text, params=None):
+        with self.lock, self.db:
+            self.db.execute('INSERT OR IGNORE INTO queries (query) VALUES (?)', (self.query_key(text, params),))
+
+
+def _index_view(params):
+    # the `kind` and `limit` of `SearchIndex.query` matching the search params
+    include = params.get('include')
+    if include is None:
+        kinds = set(indexed_kinds.values())
+    else:
+        include = [include] if isinstance(include, str) else list(include)
+        unknown = [item_type for item_type in include if item_type not in indexed_kinds]
+        if unknown:
+            raise ValueError('The index only holds {}, not {}'.format(', '.join(indexed_kinds), ', '.join(unknown)))
+        kinds = {indexed_kinds[item_type] for item_type in include}
+
+    kind = kinds.pop() if len(kinds) == 1 else None
+
+    return kind, int(params.get('perPage', default_per_page))
+
+
+def cached_search(client, index, search_input, **params):
+    """Answer `search_input` from the index, calling GET /search only on a miss.
+
+    A query is a hit only when it was searched before with the same params;
+    `include` and `perPage` then select and cap the indexed results.
+    """
+    kind, limit = _index_view(params)
+
+    if not index.seen_query(search_input, params):
+        response = client.search(search_input, **params)
+        if response.status_code != 200:
+            raise LetterboxdError(response)
+
+        index.add_search_response(response.json())
+        index.add_query(search_input, params)
+
+    return index.query(search_input, kind=kind, limit=limit)
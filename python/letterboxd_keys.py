@@ -0,0 +1,160 @@
+"""
+Pool of API keys sharing the load of one client
+http://api-docs.letterboxd.com/#auth
+
+Every script asks for a single API Key and API Secret, so the rate limit of
+one key caps the throughput of everything using it. A `KeyPool` holds
+several key/secret pairs, each with its own cached `Signer` and token
+bucket. Every request is signed with the key that has the most budget
+left; a key answered with `429 Too Many Requests` is set aside until its
+`Retry-After` has passed and the request is sent again with another key.
+A `401` without a bearer token involved, and not explained by a corrected
+clock, is sent again with another key too; only if that one gets through
+is the first key set aside, for `cooldown` seconds.
+
+Keys are read from `LETTERBOXD_API_KEYS` (`key:secret,key:secret`) or from
+every `[letterboxd...]` section of the INI file, e.g.:
+
+[letterboxd]
+api_key = ...
+api_secret = ...
+
+[letterboxd.backup]
+api_key = ...
+api_secret = ...
+rate = 5
+
+Python 3:
+>>> from letterboxd_client import LetterboxdClient
+>>> from letterboxd_keys import KeyPool
+>>> client = LetterboxdClient(None, None, key_pool=KeyPool.from_config())
+>>> client.contributor_id('2tn5')
+>>> client.key_pool.metrics()
+
+"""
+
+import os
+import threading
+import time
+from configparser import ConfigParser
+
+from letterboxd_client import default_config_path
+from letterboxd_scheduler import TokenBucket, retry_after
+from letterboxd_signing import Signer
+
+
+class Credential:
+    """One API key with its signer, rate budget and counters."""
+
+    def __init__(self, api_key, api_secret, rate=10, burst=None):
+        self.api_key = api_key
+        self.signer = Signer(api_secret)
+        self.bucket = TokenBucket(rate, burst)
+
+        self.requests = 0
+        self.throttled = 0
+        self.rejected = 0
+
+    def __repr__(self):
+        return '<Credential {}...>'.format(self.api_key[:4])
+
+
+class KeyPool:
+    """Spreads requests over several API keys by remaining budget.
+
+    `rate` and `burst` apply to every key without a rate of its own.
+    `cooldown` is how long a rejected key is set aside, and a key after a
+    `429` that came without `Retry-After`.
+    """
+
+    def __init__(self, credentials, cooldown=300.0):
+        self.credentials = list(credentials)
+        if not self.credentials:
+            raise ValueError('A key pool needs at least one API key')
+        self.cooldown = cooldown
+        self.lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config_path=None, rate=10, burst=None, **kwargs):
+        credentials = []
+
+        if os.environ.get('LETTERBOXD_API_KEYS'):
+            for pair in os.environ['LETTERBOXD_API_KEYS'].split(','):
+                api_key, _, api_secret = pair.strip().partition(':')
+                credentials.append(Credential(api_key, api_secret, rate, burst))
+        else:
+            config = ConfigParser()
+            config.read(os.path.expanduser(config_path or default_config_path))
+            for section in config.sections():
+                if section == 'letterboxd' or section.startswith('letterboxd.'):
+                    credentials.append(Credential(config.get(section, 'api_key'), config.get(section, 'api_secret'),
+                                                  config.getfloat(section, 'rate', fallback=rate), burst))
+
+        return cls(credentials, **kwargs)
+
+    def __len__(self):
+        return len(self.credentials)
+
+    def reserve(self, exclude=None):
+        """Pick a key and take a token from it; returns `(credential, delay)`.
+
+        The key with the most budget left among those not set aside wins,
+        `exclude` only if it is the sole key. If every key is set aside, the
+        one that comes back first is returned with a delay covering the rest
+        of its pause.
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            candidates = [credential for credential in self.credentials if credential is not exclude]
+            candidates = candidates or self.credentials
+            active = [credential for credential in candidates if credential.bucket.paused_until <= now]
+            if active:
+                credential = max(active, key=lambda credential: credential.bucket.available(now))
+            else:
+                credential = min(candidates, key=lambda credential: credential.bucket.paused_until)
+            credential.requests += 1
+
+        return credential, credential.bucket.reserve()
+
+    def active(self, exclude=None):
+        """Whether a key other than `exclude` can take a request right away."""
+        now = time.monotonic()
+
+        return any(credential.bucket.paused_until <= now
+                   for credential in self.credentials if credential is not exclude)
+
+    def report(self, credential, response):
+        """Set `credential` aside if `response` shows it is throttled.
+
+        Returns True when it was set aside and another key can take over the
+        request right away.
+        """
+        if response.status_code != 429:
+            return False
+
+        delay = retry_after(response)
+        with self.lock:
+            credential.throttled += 1
+        credential.bucket.pause(self.cooldown if delay is None else delay)
+
+        return self.active(exclude=credential)
+
+    def reject(self, credential):
+        """Set `credential` aside for `cooldown` after the API refused the key itself."""
+        with self.lock:
+            credential.rejected += 1
+        credential.bucket.pause(self.cooldown)
+
+    def metrics(self):
+        now = time.monotonic()
+
+        with self.lock:
+            return [{
+                'api_key': credential.api_key,
+                'requests': credential.requests,
+                'throttled': credential.throttled,
+                'rejected': credential.rejected,
+                'available': credential.bucket.available(now),
+                'set_aside_for': max(0.0, credential.bucket.paused_until - now)
+            } for credential in self.credentials]
@@ -0,0 +1,129 @@
+"""
+Compact response models
+http://api-docs.letterboxd.com/#/definitions
+
+`response.json()` turns every film contribution into a handful of nested
+dicts, which adds up when hundreds of thousands of them are kept in memory.
+The models below keep only the commonly used fields in `__slots__`
+dataclasses, intern repeated strings such as contribution types, and are
+built straight from the decoded JSON. `iter_models` converts items lazily,
+one at a time, so the source dicts can be dropped as soon as they are read.
+
+Python 3.10+:
+>>> from letterboxd_models import FilmContribution, iter_models
+>>> from letterboxd_pagination import paginate
+>>> contributions = list(iter_models(FilmContribution, paginate(client.contributor_id_contributions, '2tn5')))
+>>> contributions[0].film.name
+
+"""
+
+import sys
+from dataclasses import dataclass
+
+_intern = sys.intern
+
+
+def _optional_intern(value):
+    return _intern(value) if value is not None else None
+
+
+@dataclass(slots=True)
+class ContributorSummary:
+    # http://api-docs.letterboxd.com/#/definitions/ContributorSummary
+    id: str
+    name: str
+    character_name: str = None
+
+    @classmethod
+    def from_json(cls, data):
+        # the same few directors appear on many films, share their strings
+        return cls(_intern(data['id']), _intern(data['name']), data.get('characterName'))
+
+
+@dataclass(slots=True)
+class Contributor:
+    # http://api-docs.letterboxd.com/#/definitions/Contributor
+    id: str
+    name: str
+    tmdb_id: str = None
+    statistics: tuple = ()
+
+    @classmethod
+    def from_json(cls, data):
+        # keep the per-type film counts as (type, count) pairs
+        statistics = data.get('statistics', {}).get('contributions', ())
+        statistics = tuple((_intern(stat['type']), stat['filmCount']) for stat in statistics)
+
+        return cls(data['id'], data['name'], data.get('tmdbid'), statistics)
+
+
+@dataclass(slots=True)
+class FilmSummary:
+    # http://api-docs.letterboxd.com/#/definitions/FilmSummary
+    id: str
+    name: str
+    release_year: int = None
+    original_name: str = None
+    directors: tuple = ()
+
+    @classmethod
+    def from_json(cls, data):
+        directors = tuple(ContributorSummary.from_json(director) for director in data.get('directors', ()))
+
+        return cls(data['id'], data['name'], data.get('releaseYear'), data.get('originalName'), directors)
+
+
+@dataclass(slots=True)
+class FilmContribution:
+    # http://api-docs.letterboxd.com/#/definitions/FilmContribution
+    type: str
+    film: FilmSummary
+    character_name: str = None
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(_intern(data['type']), FilmSummary.from_json(data['film']), data.get('characterName'))
+
+
+@dataclass(slots=True)
+class SearchItem:
+    # http://api-docs.letterboxd.com/#/definitions/AbstractSearchItem
+    # `item` is a FilmSummary or Contributor for film and contributor results,
+    # and the plain JSON object for every other kind of result
+    type: str
+    score: float
+    item: object
+
+    @classmethod
+    def from_json(cls, data):
+        search_type = _intern(data['type'])
+
+        if search_type == 'FilmSearchItem':
+            item = FilmSummary.from_json(data['film'])
+        elif search_type == 'ContributorSearchItem':
+            item = Contributor.from_json(data['contributor'])
+        else:
+            item = {key: value for key, value in data.items() if key not in ('type', 'score')}
+
+        return cls(search_type, data.get('score'), item)
+
+
+@dataclass(slots=True)
+class NewsItem:
+    # http://api-docs.letterboxd.com/#/definitions/NewsItem
+    title: str
+    url: str
+    short_description: str = None
+    type: str = None
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data['title'], data.get('url'), data.get('shortDescription'), _optional_intern(data.get('type')))
+
+
+def iter_models(model, items):
+    """Convert JSON `items` into `model` instances one at a time."""
+    from_json = model.from_json
+
+    for item in items:
+        yield from_json(item)
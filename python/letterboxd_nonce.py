@@ -0,0 +1,107 @@
+"""
+Nonces and server-corrected timestamps for request signing
+http://api-docs.letterboxd.com/#signing
+
+Every signed request carries a `nonce`, which the API accepts only once,
+and a `timestamp`, which it rejects when it is too far from its own clock.
+The example scripts use `uuid.uuid4()` and `int(time.time())` for them:
+a read from the OS random source per request, and a request that is lost
+whenever the local clock has drifted.
+
+`NonceSource` draws 96 random bits once per process and appends a counter,
+so nonces are unique across threads and processes (the prefix is redrawn
+in a forked child) at the cost of a counter increment. `ServerClock`
+estimates the offset between the local and the server clock from the
+`Date` header of every response and corrects the signing timestamps by it.
+
+Python 3:
+>>> from letterboxd_nonce import nonces, ServerClock
+>>> clock = ServerClock()
+>>> params = {'nonce': nonces.next(), 'timestamp': clock.timestamp()}
+
+"""
+
+import itertools
+import math
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+
+class NonceSource:
+    """Unique nonces made of a random per-process prefix and a counter."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.prefix = os.urandom(12).hex() + '-'
+        # `next()` on an itertools counter is atomic under the GIL
+        self.counter = itertools.count()
+
+    def next(self):
+        return self.prefix + format(next(self.counter), 'x')
+
+
+# shared by every client in the process
+nonces = NonceSource()
+
+if hasattr(os, 'register_at_fork'):
+    # a forked child would otherwise continue the parent's sequence
+    os.register_at_fork(after_in_child=nonces.reset)
+
+
+class ServerClock:
+    """Local time corrected by the estimated offset of the server clock.
+
+    Each response bounds the offset: the server wrote its `Date` (whole
+    seconds) after the request was sent and before the response arrived.
+    The bounds of all responses are intersected and the estimate is their
+    midpoint; when they no longer overlap, because either clock jumped, the
+    estimate restarts from the latest response. `tolerance` is how far the
+    estimate may move before a request signed with the old one is retried.
+    """
+
+    def __init__(self, tolerance=30.0):
+        self.tolerance = tolerance
+        self.offset = 0.0
+        self.low = -math.inf
+        self.high = math.inf
+        self.lock = threading.Lock()
+        # the header changes once a second, so the last one parsed is kept around
+        self._date = (None, None)
+
+    def time(self):
+        return time.time() + self.offset
+
+    def timestamp(self):
+        return int(time.time() + self.offset)
+
+    def _parse(self, date):
+        header, server_time = self._date
+        if header != date:
+            try:
+                server_time = parsedate_to_datetime(date).timestamp()
+            except (TypeError, ValueError):
+                return None
+            self._date = (date, server_time)
+
+        return server_time
+
+    def observe(self, date, sent_at, received_at):
+        """Update the estimate from a response `Date` header and local send/receive times."""
+        server_time = self._parse(date) if date else None
+        if server_time is None:
+            return
+
+        low, high = server_time - received_at, server_time + 1 - sent_at
+        with self.lock:
+            if max(self.low, low) <= min(self.high, high):
+                low, high = max(self.low, low), min(self.high, high)
+            self.low, self.high = low, high
+            self.offset = (low + high) / 2
+
+    def moved(self, offset):
+        """Whether the estimate moved more than `tolerance` away from `offset`."""
+        return abs(self.offset - offset) > self.tolerance
@@ -0,0 +1,99 @@
+"""
+Cursor pagination for list endpoints
+http://api-docs.letterboxd.com/#/definitions/Cursor
+
+`/contributor/{id}/contributions`, `/news` and `/search` return one page of
+`items` plus a `next` cursor. The helpers below follow that cursor lazily and
+yield items as pages arrive, so memory stays flat regardless of the total
+number of results. With `prefetch=True` the next page is already being
+fetched while the caller works through the current one.
+
+Python 3:
+>>> from letterboxd_client import LetterboxdClient
+>>> from letterboxd_pagination import paginate
+>>> with LetterboxdClient(api_key, api_secret) as client:
+...     for contribution in paginate(client.contributor_id_contributions, '2tn5', perPage=100):
+...         print(contribution['film']['name'])
+
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from letterboxd_client import LetterboxdError
+
+
+def _page(response):
+    if response.status_code != 200:
+        raise LetterboxdError(response)
+
+    json_response = response.json()
+
+    return json_response.get('items', []), json_response.get('next')
+
+
+def iter_pages(method, *args, prefetch=False, **params):
+    """Yield `(items, next_cursor)` for every page `method(*args, **params)` returns."""
+    if not prefetch:
+        while True:
+            items, cursor = _page(method(*args, **params))
+            yield items, cursor
+
+            if not cursor:
+                return
+            params['cursor'] = cursor
+
+    # fetch the next page on a background thread while the current one is consumed
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        pending = executor.submit(method, *args, **params)
+
+        while True:
+            items, cursor = _page(pending.result())
+
+            if cursor:
+                params['cursor'] = cursor
+                pending = executor.submit(method, *args, **params)
+
+            yield items, cursor
+
+            if not cursor:
+                return
+
+
+def paginate(method, *args, prefetch=False, **params):
+    """Yield every item across all pages, one at a time."""
+    for items, _ in iter_pages(method, *args, prefetch=prefetch, **params):
+        yield from items
+
+
+async def aiter_pages(method, *args, prefetch=True, **params):
+    """Async counterpart of `iter_pages` for `AsyncLetterboxdClient` methods."""
+    pending = asyncio.ensure_future(method(*args, **params))
+
+    try:
+        while True:
+            items, cursor = _page(await pending)
+            pending = None
+
+            if cursor:
+                params['cursor'] = cursor
+                if prefetch:
+                    pending = asyncio.ensure_future(method(*args, **params))
+
+            yield items, cursor
+
+            if not cursor:
+                return
+            if pending is None:
+                pending = asyncio.ensure_future(method(*args, **params))
+    finally:
+        # the consumer stopped early, don't leave a page fetch running
+        if pending is not None and not pending.done():
+            pending.cancel()
+
+
+async def apaginate(method, *args, prefetch=True, **params):
+    """Async counterpart of `paginate`."""
+    async for items, _ in aiter_pages(method, *args, prefetch=prefetch, **params):
+        for item in items:
+            yield item
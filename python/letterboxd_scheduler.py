@@ -0,0 +1,197 @@
+"""
+Rate-limit-aware request scheduler
+http://api-docs.letterboxd.com/#throttling
+
+Every signed request of a client can be routed through a `Scheduler`. It
+spaces requests out with a token bucket, and when the API answers
+`429 Too Many Requests` it honours `Retry-After` (pausing every caller, not
+only the one that was throttled) or falls back to jittered exponential
+backoff. Each retry calls back into the client, so the request is re-signed
+with a fresh nonce and timestamp.
+
+Python 3:
+>>> from letterboxd_client import LetterboxdClient
+>>> from letterboxd_scheduler import Scheduler
+>>> scheduler = Scheduler(rate=5, burst=10)
+>>> client = LetterboxdClient(api_key, api_secret, scheduler=scheduler)
+>>> client.contributor_id('2tn5')
+>>> scheduler.metrics()
+
+"""
+
+import asyncio
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+retry_statuses = (429, 503)
+
+
+class TokenBucket:
+    """Hands out `rate` tokens per second with bursts of up to `capacity`.
+
+    `reserve()` never blocks: it takes a token (possibly going into debt) and
+    returns how long the caller has to wait before using it, so the same
+    bucket serves threads and asyncio tasks alike, in FIFO order.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+
+            delay = max(0.0, -self.tokens / self.rate)
+
+            return max(delay, self.paused_until - now)
+
+    def available(self, now=None):
+        """Tokens left right now, negative while callers are still waiting on earlier ones."""
+        with self.lock:
+            now = time.monotonic() if now is None else now
+            return min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+
+    def pause(self, seconds):
+        # stop handing out usable tokens until the server lets us back in
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def retry_after(response):
+    """Seconds to wait according to the `Retry-After` header, or None."""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Scheduler:
+    """Token-bucket rate limiting plus 429 retries for signed requests.
+
+    `rate` is the number of requests per second allowed on average, `burst`
+    how many may be sent back to back. A throttled request is retried up to
+    `max_retries` times, waiting `Retry-After` when the server sends it and
+    `backoff * 2 ** attempt` (full jitter, capped at `max_backoff`) otherwise.
+    """
+
+    def __init__(self, rate=10, burst=None, max_retries=5, backoff=0.5, max_backoff=60.0):
+        self.bucket = TokenBucket(rate, burst)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.lock = threading.Lock()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.wait_time = 0.0
+        self.backoff_time = 0.0
+
+    def metrics(self):
+        with self.lock:
+            return {
+                'queue_depth': self.queue_depth,
+                'max_queue_depth': self.max_queue_depth,
+                'requests': self.requests,
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'wait_time': self.wait_time,
+                'backoff_time': self.backoff_time
+            }
+
+    def _enqueue(self):
+        with self.lock:
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+
+        return self.bucket.reserve()
+
+    def _dequeue(self, waited):
+        with self.lock:
+            self.queue_depth -= 1
+            self.requests += 1
+            self.wait_time += waited
+
+    def _retry_delay(self, response, attempt):
+        """Seconds to wait before retrying `response`, or None if it is final."""
+        if response.status_code not in retry_statuses or attempt >= self.max_retries:
+            return None
+
+        with self.lock:
+            self.retries += 1
+            if response.status_code == 429:
+                self.throttled += 1
+
+        delay = retry_after(response)
+        if delay is not None:
+            self.bucket.pause(delay)
+        else:
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+        with self.lock:
+            self.backoff_time += delay
+
+        return delay
+
+    def execute(self, send):
+        """Call `send()` under the rate limit, retrying throttled responses.
+
+        `send` must build, sign and send a new request every time it is called.
+        """
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            delay = self._enqueue()
+            if delay > 0:
+                time.sleep(delay)
+            self._dequeue(time.monotonic() - start)
+
+            response = send()
+
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                return response
+
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    async def aexecute(self, send):
+        """Async counterpart of `execute`; `send` is a coroutine function."""
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            delay = self._enqueue()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._dequeue(time.monotonic() - start)
+
+            response = await send()
+
+            delay = self._retry_delay(response, attempt)
+            if delay is None:
+                return response
+
+            await asyncio.sleep(delay)
+            attempt += 1
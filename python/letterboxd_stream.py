@@ -0,0 +1,200 @@
+"""
+Streaming JSON decoding and NDJSON output for list endpoints
+
+The example scripts load every response with `response.json()` and print
+it again with `json.dumps(...)`, so a large contributions or search page is
+fully parsed and fully re-serialised. `ItemStream` instead decodes the
+`items` of a streamed response one at a time while the body is still being
+downloaded, and `write_ndjson` writes each item out as one line of JSON.
+Peak memory is bounded by the largest single item, not by the page.
+
+When installed, `ijson` is used to decode and `orjson` to encode; both are
+optional and the standard library is used otherwise.
+
+Python 3:
+>>> import sys
+>>> from letterboxd_client import LetterboxdClient
+>>> from letterboxd_stream import stream_items, write_ndjson
+>>> with LetterboxdClient(api_key, api_secret) as client:
+...     write_ndjson(stream_items(client, '/contributor/2tn5/contributions', perPage=100), sys.stdout)
+
+"""
+
+import codecs
+import json
+
+from letterboxd_client import LetterboxdError
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_whitespace = ' \t\n\r'
+
+
+class ItemStream:
+    """Iterates over the `items` of a streamed list response.
+
+    The other top-level fields (`next`, `metadata`, ...) are collected in
+    `fields` while iterating; `next` is only known once iteration finished
+    when the API sends it after the items.
+    """
+
+    def __init__(self, response, chunk_size=64 * 1024):
+        if response.status_code != 200:
+            raise LetterboxdError(response)
+
+        self.response = response
+        self.chunk_size = chunk_size
+        self.fields = {}
+
+    @property
+    def next(self):
+        return self.fields.get('next')
+
+    def __iter__(self):
+        try:
+            if ijson is not None:
+                yield from self._iter_ijson()
+            else:
+                yield from self._iter_stdlib()
+        finally:
+            self.response.close()
+
+    def _iter_ijson(self):
+        self.response.raw.decode_content = True
+        builder = None
+        target = None
+
+        for prefix, event, value in ijson.parse(self.response.raw, use_float=True):
+            if builder is None:
+                # only single items and top-level fields other than `items` are of interest
+                if prefix != 'items.item' and (not prefix or '.' in prefix or prefix == 'items'):
+                    continue
+                if event not in ('start_map', 'start_array'):
+                    if prefix == 'items.item':
+                        yield value
+                    elif event != 'map_key':
+                        self.fields[prefix] = value
+                    continue
+                builder = ijson.ObjectBuilder()
+                target = prefix
+
+            builder.event(event, value)
+
+            if prefix == target and event in ('end_map', 'end_array'):
+                if target == 'items.item':
+                    yield builder.value
+                else:
+                    self.fields[target] = builder.value
+                builder = None
+
+    def _iter_stdlib(self):
+        decoder = json.JSONDecoder()
+        chunks = self.response.iter_content(self.chunk_size)
+        text_decoder = codecs.getincrementaldecoder('utf-8')()
+        buffer = ''
+        position = 0
+        exhausted = False
+
+        def fill():
+            # drop what has been consumed and read the next chunk
+            nonlocal buffer, position, exhausted
+            chunk = next(chunks, None)
+            if chunk is None:
+                exhausted = True
+                buffer = buffer[position:] + text_decoder.decode(b'', final=True)
+            else:
+                buffer = buffer[position:] + text_decoder.decode(chunk)
+            position = 0
+
+        def skip(characters):
+            nonlocal position
+            while True:
+                while position < len(buffer) and buffer[position] in characters:
+                    position += 1
+                if position < len(buffer) or exhausted:
+                    return
+                fill()
+
+        def expect(character):
+            nonlocal position
+            skip(_whitespace)
+            if buffer[position:position + 1] != character:
+                raise ValueError('Expected {!r} at offset {} of the response body'.format(character, position))
+            position += 1
+
+        def value():
+            # decode one complete JSON value, reading more of the body until it is complete
+            nonlocal position
+            skip(_whitespace)
+            while True:
+                try:
+                    decoded, end = decoder.raw_decode(buffer, position)
+                    # a number at the very end of the buffer may continue in the next chunk
+                    if end < len(buffer) or exhausted:
+                        position = end
+                        return decoded
+                except json.JSONDecodeError:
+                    if exhausted:
+                        raise
+                fill()
+
+        expect('{')
+        while True:
+            skip(_whitespace + ',')
+            if buffer[position:position + 1] == '}':
+                return
+
+            key = value()
+            expect(':')
+
+            if key != 'items':
+                self.fields[key] = value()
+                continue
+
+            expect('[')
+            while True:
+                skip(_whitespace + ',')
+                if buffer[position:position + 1] == ']':
+                    position += 1
+                    break
+                yield value()
+
+
+def stream_items(client, path, all_pages=True, **params):
+    """Yield the items of GET `path`, following the `next` cursor when `all_pages`."""
+    while True:
+        items = ItemStream(client.request('get', path, params=params, stream=True))
+        yield from items
+
+        if not all_pages or not items.next:
+            return
+        params['cursor'] = items.next
+
+
+def dumps(item):
+    if orjson is not None:
+        return orjson.dumps(item)
+
+    return json.dumps(item, separators=(',', ':')).encode()
+
+
+def write_ndjson(items, out):
+    """Write every item as one line of JSON to the text or binary stream `out`."""
+    out = getattr(out, 'buffer', out)
+    count = 0
+
+    for item in items:
+        out.write(dumps(item) + b'\n')
+        count += 1
+
+    out.flush()
+
+    return count
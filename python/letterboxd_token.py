@@ -0,0 +1,235 @@
+"""
+Access-token manager for POST /auth/token
+http://api-docs.letterboxd.com/#auth
+
+`auth_token.py` prints a token for you to paste into the bearer-token
+scripts. `TokenManager` requests the token once, keeps it together with its
+expiry and refreshes it on a background timer shortly before `expires_in`
+runs out. All callers that need a fresh token at the same time share a
+single in-flight refresh, so requests don't stall on an expired-token 401
+followed by a serial re-login.
+
+Python 3:
+>>> from letterboxd_client import LetterboxdClient
+>>> from letterboxd_token import TokenManager
+>>> client = LetterboxdClient(api_key, api_secret)
+>>> client.token_manager = TokenManager(client, username, password)
+>>> client.me_get().json()
+
+>>> from letterboxd_async import AsyncLetterboxdClient
+>>> async with AsyncLetterboxdClient(api_key, api_secret) as client:
+...     client.token_manager = TokenManager(client, username, password)
+...     response = await client.me_get()
+
+"""
+
+import asyncio
+import threading
+import time
+from getpass import getpass
+
+from letterboxd_client import LetterboxdError
+
+
+class TokenManager:
+    """Keeps a valid access token around for `client`.
+
+    The token is refreshed `refresh_margin` seconds before it expires. With
+    a refresh token the `refresh_token` grant is used, falling back to the
+    `password` grant when the refresh token is rejected and a username and
+    password are known.
+
+    `client` may also be an `AsyncLetterboxdClient`, whose tokens are then
+    only available through `atoken`; the token is refreshed on the event
+    loop, when a caller asks for it within `refresh_margin` of its expiry,
+    instead of on a background thread.
+    """
+
+    def __init__(self, client, username=None, password=None, refresh_token=None,
+                 refresh_margin=60.0, background=True):
+        self.client = client
+        self.username = username
+        self.password = password
+        self.refresh_token = refresh_token
+        self.refresh_margin = refresh_margin
+        self.background = background
+
+        self.access_token = None
+        self.expires_at = 0.0
+
+        self.lock = threading.Lock()
+        self.refreshing = None
+        self.error = None
+        self.timer = None
+
+        # the endpoint methods of an asyncio client return coroutines, which only `atoken` awaits
+        self.is_async = asyncio.iscoroutinefunction(client.request)
+        self.arefreshing = None
+
+    @classmethod
+    def from_input(cls, client, **kwargs):
+        username = input('Username or email address: ')
+        password = getpass('Password: ')
+
+        return cls(client, username, password, **kwargs)
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def token(self):
+        """Return a valid access token, fetching or refreshing it if needed."""
+        if self.is_async:
+            raise TypeError('The token of an asyncio client is only available through `await atoken()`')
+
+        access_token, expires_at = self.access_token, self.expires_at
+        now = time.monotonic()
+
+        if access_token is not None and now < expires_at:
+            if now >= expires_at - self.refresh_margin:
+                # still valid: hand it out and refresh in the background
+                self._refresh_async()
+            return access_token
+
+        return self.renew()
+
+    async def atoken(self):
+        """Async counterpart of `token`; a blocking client refreshes on a worker thread."""
+        access_token, expires_at = self.access_token, self.expires_at
+        now = time.monotonic()
+
+        if not self.is_async:
+            if access_token is not None and now < expires_at - self.refresh_margin:
+                return access_token
+            return await asyncio.to_thread(self.token)
+
+        if access_token is not None and now < expires_at:
+            if now >= expires_at - self.refresh_margin:
+                # still valid: hand it out and refresh in the background
+                self._arenew()
+            return access_token
+
+        # shielded, so that a cancelled caller doesn't cancel the refresh the others wait for
+        return await asyncio.shield(self._arenew())
+
+    def _arenew(self):
+        # the one in-flight refresh on the event loop, started if there is none
+        if self.arefreshing is None:
+            self.arefreshing = asyncio.ensure_future(self._arenew_token())
+            self.arefreshing.add_done_callback(self._arenewed)
+
+        return self.arefreshing
+
+    async def _arenew_token(self):
+        self._store(await self._arequest_token())
+
+        return self.access_token
+
+    def _arenewed(self, task):
+        self.arefreshing = None
+        if not task.cancelled():
+            # retrieved here so that a failed background refresh isn't reported as never retrieved;
+            # the next caller of `atoken()` retries once the old token has expired
+            task.exception()
+
+    def invalidate(self, access_token):
+        """Forget `access_token` after the API rejected it with a 401."""
+        with self.lock:
+            if self.access_token == access_token:
+                self.access_token = None
+                self.expires_at = 0.0
+
+    def renew(self):
+        """Fetch a new token, sharing one request between concurrent callers."""
+        with self.lock:
+            refreshing = self.refreshing
+            if refreshing is None:
+                refreshing = self.refreshing = threading.Event()
+                owner = True
+            else:
+                owner = False
+
+        if not owner:
+            refreshing.wait()
+            if self.access_token is None:
+                raise self.error
+            return self.access_token
+
+        try:
+            self.error = None
+            self._store(self._request_token())
+        except Exception as error:
+            self.error = error
+            raise
+        finally:
+            with self.lock:
+                self.refreshing = None
+            refreshing.set()
+
+        return self.access_token
+
+    def _request_token(self):
+        if self.refresh_token is not None:
+            response = self.client.auth_token_refresh(self.refresh_token)
+            if response.status_code == 200:
+                return response.json()
+            if self.username is None:
+                raise LetterboxdError(response)
+
+        if self.username is None:
+            raise ValueError('A username and password or a refresh token is required')
+
+        response = self.client.auth_token_generate(self.username, self.password)
+        if response.status_code != 200:
+            # the credentials were not correct for the member, or the account was not found
+            raise LetterboxdError(response)
+
+        return response.json()
+
+    async def _arequest_token(self):
+        if self.refresh_token is not None:
+            response = await self.client.auth_token_refresh(self.refresh_token)
+            if response.status_code == 200:
+                return response.json()
+            if self.username is None:
+                raise LetterboxdError(response)
+
+        if self.username is None:
+            raise ValueError('A username and password or a refresh token is required')
+
+        response = await self.client.auth_token_generate(self.username, self.password)
+        if response.status_code != 200:
+            # the credentials were not correct for the member, or the account was not found
+            raise LetterboxdError(response)
+
+        return response.json()
+
+    def _store(self, json_response):
+        # see here for the response properties http://api-docs.letterboxd.com/#/definitions/AccessToken
+        expires_in = float(json_response['expires_in'])
+
+        with self.lock:
+            self.access_token = json_response['access_token']
+            self.refresh_token = json_response.get('refresh_token', self.refresh_token)
+            self.expires_at = time.monotonic() + expires_in
+
+        if self.background and not self.is_async:
+            self._schedule(max(0.0, expires_in - self.refresh_margin))
+
+    def _schedule(self, delay):
+        self.close()
+        self.timer = threading.Timer(delay, self._background_renew)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def _background_renew(self):
+        try:
+            self.renew()
+        except Exception:
+            # the next caller of `token()` retries once the old token has expired
+            pass
+
+    def _refresh_async(self):
+        if self.refreshing is None:
+            threading.Thread(target=self._background_renew, daemon=True).start()
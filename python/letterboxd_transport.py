@@ -0,0 +1,176 @@
+"""
+HTTP/2 transport for the signed-request pipeline
+http://api-docs.letterboxd.com/#signing
+
+`LetterboxdClient` signs a `requests` prepared request and hands it to
+whatever transport adapter is mounted on its session: by default a pooled
+HTTP/1.1 `HTTPAdapter`, which sends one request per connection at a time.
+`HTTP2Adapter` is a drop-in transport adapter backed by an httpx HTTP/2
+client, multiplexing all concurrent requests over a few connections.
+
+Requests are prepared and signed exactly as before and the signed URL is
+sent byte for byte, so the signature over method, URL and body is the same
+on either transport.
+
+Python 3 (requires `pip install httpx[http2]`):
+>>> from letterboxd_client import LetterboxdClient
+>>> from letterboxd_transport import HTTP2Adapter
+>>> client = LetterboxdClient(api_key, api_secret, transport=HTTP2Adapter(max_connections=2))
+>>> client.contributor_id('2tn5')
+
+"""
+
+import asyncio
+import datetime
+import threading
+import time
+
+import httpx
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+def _timeout(timeout):
+    # `requests` timeouts are None, seconds, or a (connect, read) tuple
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+
+    return httpx.Timeout(timeout)
+
+
+class _RawStream:
+    """File-like body of an httpx response, to serve as `requests.Response.raw`.
+
+    Bodies that were read already (`stream=False`) are served from memory.
+    """
+
+    def __init__(self, response, loop, stream=True):
+        self.response = response
+        self.loop = loop
+        self.chunks = response.aiter_bytes() if stream else None
+        self.buffer = b'' if stream else response.content
+
+    def _next(self):
+        if self.chunks is None:
+            return None
+
+        # pull the next chunk through the adapter's event loop
+        try:
+            return asyncio.run_coroutine_threadsafe(self.chunks.__anext__(), self.loop).result()
+        except StopAsyncIteration:
+            return None
+
+    def stream(self, chunk_size=2 ** 16, decode_content=True):
+        # through `read`, like urllib3, so a `read` wrapped to count the body sees every byte
+        while True:
+            data = self.read(chunk_size or 2 ** 16)
+            if not data:
+                return
+            yield data
+
+    def read(self, amt=None, decode_content=True):
+        while amt is None or len(self.buffer) < amt:
+            chunk = self._next()
+            if chunk is None:
+                break
+            self.buffer += chunk
+
+        if amt is None:
+            amt = len(self.buffer)
+        data, self.buffer = self.buffer[:amt], self.buffer[amt:]
+
+        return data
+
+    def tell(self):
+        # like urllib3: body bytes received so far, before `Content-Encoding` was undone
+        return self.response.num_bytes_downloaded
+
+    def close(self):
+        if self.chunks is not None:
+            asyncio.run_coroutine_threadsafe(self.response.aclose(), self.loop).result()
+
+    def release_conn(self):
+        self.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """`requests` transport adapter sending over HTTP/2 with httpx.
+
+    At most `max_connections` connections are opened; HTTP/2 multiplexes
+    every concurrent request over them. HTTPS negotiates HTTP/2 with ALPN;
+    plain HTTP is only spoken as HTTP/2 with `prior_knowledge=True` (h2c),
+    e.g. for a local stub.
+
+    The requests of all calling threads are sent from one event loop
+    thread: httpx's blocking HTTP/2 client can put the streams of
+    concurrent threads on the wire out of order, which servers reject.
+    """
+
+    def __init__(self, max_connections=4, prior_knowledge=False, verify=True):
+        super().__init__()
+        self.client = httpx.AsyncClient(
+            http1=not prior_knowledge,
+            http2=True,
+            verify=verify,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+
+    async def _send(self, http_request, stream):
+        http_response = await self.client.send(http_request, stream=True)
+        headers_received = time.perf_counter()
+
+        if not stream:
+            await http_response.aread()
+            await http_response.aclose()
+
+        return http_response, headers_received
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        body = request.body
+        if isinstance(body, str):
+            body = body.encode()
+
+        http_request = self.client.build_request(request.method, request.url, content=body,
+                                                 headers=dict(request.headers), timeout=_timeout(timeout))
+        # the URL was signed exactly as `requests` encoded it, so it goes out exactly like that
+        http_request.url = http_request.url.copy_with(raw_path=request.path_url.encode())
+
+        start = time.perf_counter()
+        try:
+            http_response, headers_received = asyncio.run_coroutine_threadsafe(
+                self._send(http_request, stream), self.loop
+            ).result()
+        except httpx.TimeoutException as error:
+            raise requests.Timeout(error, request=request)
+        except httpx.TransportError as error:
+            raise requests.ConnectionError(error, request=request)
+
+        response = requests.Response()
+        response.status_code = http_response.status_code
+        response.reason = http_response.reason_phrase
+        response.headers = CaseInsensitiveDict(http_response.headers)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = _RawStream(http_response, self.loop, stream)
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        # like `requests`, from sending the request until the headers were parsed
+        response.elapsed = datetime.timedelta(seconds=headers_received - start)
+
+        return response
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+
+        asyncio.run_coroutine_threadsafe(self.client.aclose(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
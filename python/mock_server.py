@@ -0,0 +1,584 @@
+"""
+Offline stand-in for the Letterboxd API
+http://api-docs.letterboxd.com/#signing
+
+Serves every endpoint the examples use from generated, paginated fixtures
+and checks the `apikey`/`nonce`/`timestamp`/`signature` scheme exactly like
+the API does: the signature must be the final query parameter and match the
+HMAC/SHA-256 of method, URL and body, the timestamp must be recent and a
+nonce may only be used once. Latency and `429 Too Many Requests` responses
+can be injected to exercise clients and schedulers. `MockLetterboxdH2`
+serves the same API over cleartext HTTP/2.
+
+Python 3:
+$ python3 ./mock_server.py --port 8000 --latency 0.05 --throttle 0.1
+
+>>> from mock_server import MockLetterboxd
+>>> with MockLetterboxd() as server:
+...     client = LetterboxdClient(server.api_key, server.api_secret, base_url=server.base_url)
+
+"""
+
+import gzip
+import hashlib
+import json
+import multiprocessing
+import random
+import threading
+import time
+import uuid
+from argparse import ArgumentParser
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import BaseRequestHandler, ThreadingTCPServer
+from urllib.parse import parse_qs, urlsplit
+
+from letterboxd_signing import Signer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+api_prefix = '/api/v0'
+
+genres = [
+    {'id': '8G', 'name': 'Action'}, {'id': '9k', 'name': 'Adventure'}, {'id': '8m', 'name': 'Animation'},
+    {'id': '7I', 'name': 'Comedy'}, {'id': '9Y', 'name': 'Crime'}, {'id': 'ai', 'name': 'Documentary'},
+    {'id': '7S', 'name': 'Drama'}, {'id': '8w', 'name': 'Family'}, {'id': '82', 'name': 'Fantasy'},
+    {'id': 'aW', 'name': 'History'}, {'id': 'aC', 'name': 'Horror'}, {'id': 'b6', 'name': 'Music'},
+    {'id': 'aM', 'name': 'Mystery'}, {'id': '8c', 'name': 'Romance'}, {'id': '9a', 'name': 'Science Fiction'},
+    {'id': 'a8', 'name': 'Thriller'}, {'id': '9u', 'name': 'War'}, {'id': '8Q', 'name': 'Western'}
+]
+
+film_services = [
+    {'id': 'amazon', 'name': 'Amazon'}, {'id': 'netflix', 'name': 'Netflix'},
+    {'id': 'hulu', 'name': 'Hulu'}, {'id': 'mubi', 'name': 'MUBI'}
+]
+
+contribution_types = ['Director', 'Actor', 'Producer', 'Writer', 'Editor', 'Cinematography']
+
+
+def lid(number):
+    # short base-62 identifiers, like the API's LIDs
+    alphabet = '0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    value = ''
+    while True:
+        number, digit = divmod(number, 62)
+        value = alphabet[digit] + value
+        if number == 0:
+            return value
+
+
+class Fixtures:
+    """Deterministic contributors, films and news items."""
+
+    def __init__(self, contributors=1000, films_per_contributor=60, news_items=500, seed=0):
+        generator = random.Random(seed)
+
+        self.films = []
+        for number in range(max(contributors * 10, films_per_contributor)):
+            year = 1920 + generator.randrange(105)
+            film = {
+                'id': lid(100000 + number),
+                'name': 'Film {}'.format(number),
+                'releaseYear': year,
+                'genres': [generator.choice(genres)],
+                'links': [
+                    {'type': 'imdb', 'id': 'tt{:07d}'.format(number)},
+                    {'type': 'tmdb', 'id': str(number + 1)}
+                ]
+            }
+            if number % 40 == 39:
+                # announced films have no release year yet
+                del film['releaseYear']
+            self.films.append(film)
+
+        # films by LID and by `imdb:`/`tmdb:` prefixed external ID, as `filmId` accepts them
+        self.film_ids = {}
+        for film in self.films:
+            self.film_ids[film['id']] = film
+            for link in film['links']:
+                self.film_ids[link['type'] + ':' + link['id']] = film
+
+        self.contributors = {}
+        self.contributions = {}
+        for number in range(contributors):
+            contributor_id = lid(number)
+            name = 'Contributor {}'.format(number)
+            contributions = []
+            for film in generator.sample(self.films, films_per_contributor):
+                contribution_type = generator.choice(contribution_types)
+                film = dict(film, directors=[{'id': contributor_id, 'name': name}])
+                contributions.append({'type': contribution_type, 'film': film})
+
+            self.contributors[contributor_id] = {
+                'id': contributor_id,
+                'name': name,
+                'tmdbid': str(number),
+                'statistics': {'contributions': [
+                    {'type': contribution_type,
+                     'filmCount': sum(1 for c in contributions if c['type'] == contribution_type)}
+                    for contribution_type in contribution_types
+                ]}
+            }
+            self.contributions[contributor_id] = contributions
+
+        self.news = [
+            {
+                'id': lid(500000 + number),
+                'title': 'News item {}'.format(number),
+                'url': 'https://letterboxd.com/journal/{}/'.format(number),
+                'shortDescription': 'Short description of news item {}.'.format(number)
+            }
+            for number in range(news_items)
+        ]
+
+
+def page(items, query, default_per_page=20):
+    # cursors are opaque to clients; here they simply encode the offset
+    cursor = query.get('cursor', ['start=0'])[0]
+    start = int(cursor.split('=', 1)[1])
+    per_page = min(100, int(query.get('perPage', [default_per_page])[0]))
+
+    response = {'items': items[start:start + per_page]}
+    if start + per_page < len(items):
+        response['next'] = 'start={}'.format(start + per_page)
+
+    return response
+
+
+class MockLetterboxd:
+    """A local, threaded Letterboxd API serving generated fixtures.
+
+    `latency` seconds (plus up to `jitter` more) are added to every
+    response, and a `throttle` fraction of requests is answered with 429
+    and a `Retry-After` of `retry_after` seconds. `max_skew` is the largest
+    accepted difference between the request timestamp and the server clock,
+    which runs `clock_offset` seconds ahead of the local one. With
+    `compress`, bodies are sent with the best `Accept-Encoding` offered
+    among brotli (when installed) and gzip.
+    """
+
+    def __init__(self, api_key='mock-key', api_secret='mock-secret', host='127.0.0.1', port=0,
+                 latency=0.0, jitter=0.0, throttle=0.0, retry_after=1, max_skew=300,
+                 fixtures=None, clock_offset=0.0, etags=True, compress=True):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.signer = Signer(api_secret)
+        self.latency = latency
+        self.jitter = jitter
+        self.throttle = throttle
+        self.retry_after = retry_after
+        self.max_skew = max_skew
+        self.clock_offset = clock_offset
+        self.etags = etags
+        self.compress = compress
+        self.fixtures = fixtures or Fixtures()
+
+        self.lock = threading.Lock()
+        self.nonces = set()
+        self.tokens = {}
+        self.members = {}
+        self.counters = {'requests': 0, 'rejected': 0, 'throttled': 0, 'not_modified': 0}
+
+        self.server = self._server(host, port)
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return 'http://{}:{}{}'.format(host, port, api_prefix)
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def count(self, counter):
+        with self.lock:
+            self.counters[counter] += 1
+
+    def now(self):
+        return time.time() + self.clock_offset
+
+    def verify(self, method, url, query, body):
+        """Return an error message if the request is not signed correctly."""
+        if query.get('apikey', [None])[0] != self.api_key:
+            return 'Unknown API key'
+
+        if not url.rsplit('&', 1)[-1].startswith('signature='):
+            return 'The signature must be the final query parameter'
+        unsigned_url, signature = url.rsplit('&signature=', 1)
+        if signature != self.signer.signature(method, unsigned_url, body):
+            return 'Invalid signature'
+
+        try:
+            timestamp = int(query['timestamp'][0])
+        except (KeyError, ValueError):
+            return 'Missing timestamp'
+        if abs(self.now() - timestamp) > self.max_skew:
+            return 'Timestamp out of range'
+
+        nonce = query.get('nonce', [None])[0]
+        if not nonce:
+            return 'Missing nonce'
+        with self.lock:
+            if nonce in self.nonces:
+                return 'Nonce already used'
+            self.nonces.add(nonce)
+
+        return None
+
+    def route(self, method, path, query, body, headers):
+        """Return `(status, json_body)` for an already verified request."""
+        fixtures = self.fixtures
+        parts = path.strip('/').split('/')
+
+        if method == 'POST' and path == '/auth/token':
+            form = parse_qs(body)
+            grant_type = form.get('grant_type', [None])[0]
+            if grant_type == 'password':
+                username = form.get('username', [''])[0]
+                if not username or form.get('password', [''])[0] == 'wrong':
+                    return 400, {'error': 'invalid_grant'}
+            elif grant_type == 'refresh_token':
+                username = self.tokens.get(form.get('refresh_token', [''])[0])
+                if username is None:
+                    return 400, {'error': 'invalid_grant'}
+            else:
+                return 400, {'error': 'unsupported_grant_type'}
+
+            access_token, refresh_token = uuid.uuid4().hex, uuid.uuid4().hex
+            with self.lock:
+                self.tokens[access_token] = username
+                self.tokens[refresh_token] = username
+            return 200, {'access_token': access_token, 'token_type': 'bearer',
+                         'refresh_token': refresh_token, 'expires_in': 3600}
+
+        if method == 'POST' and path == '/auth/forgotten-password-request':
+            return 204, None
+
+        if method == 'GET' and path == '/auth/username-check':
+            username = query.get('username', [''])[0]
+            result = 'NotAvailable' if username in self.members else 'Available'
+            return 200, {'result': result}
+
+        if path.startswith('/me'):
+            authorization = headers.get('Authorization', '')
+            username = self.tokens.get(authorization[len('Bearer '):]) if authorization.startswith('Bearer ') else None
+            if username is None:
+                return 401, None
+
+            member = self.members.setdefault(username, {'username': username, 'givenName': '', 'bio': ''})
+            if method == 'GET' and path == '/me':
+                return 200, {'member': dict(member), 'emailAddress': username + '@example.com'}
+            if method == 'PATCH' and path == '/me':
+                member.update(json.loads(body or '{}'))
+                return 200, {'data': {'member': dict(member)}, 'messages': []}
+            if method == 'POST' and path == '/me/validation-request':
+                return 204, None
+
+        if method == 'GET' and parts[0] == 'contributor' and len(parts) in (2, 3):
+            contributor = fixtures.contributors.get(parts[1])
+            if contributor is None:
+                return 404, None
+            if len(parts) == 2:
+                return 200, contributor
+            if parts[2] == 'contributions':
+                contributions = fixtures.contributions[parts[1]]
+                if 'type' in query:
+                    contributions = [c for c in contributions if c['type'] == query['type'][0]]
+                if 'decade' in query:
+                    decade = int(query['decade'][0])
+                    contributions = [c for c in contributions
+                                     if decade <= c['film'].get('releaseYear', -1) < decade + 10]
+                response = page(contributions, query)
+                response['metadata'] = {'totalCount': len(contributions)}
+                return 200, response
+
+        if method == 'GET' and parts[0] == 'film' and len(parts) == 2:
+            film = fixtures.film_ids.get(parts[1])
+            if film is None:
+                return 404, None
+            return 200, film
+
+        if method == 'GET' and path == '/films':
+            films = fixtures.films
+            if 'filmId' in query:
+                films = list({id(fixtures.film_ids[film_id]): fixtures.film_ids[film_id]
+                              for film_id in query['filmId'] if film_id in fixtures.film_ids}.values())
+            return 200, page(films, query)
+
+        if method == 'GET' and path == '/films/genres':
+            return 200, {'items': genres}
+
+        if method == 'GET' and path == '/films/film-services':
+            return 200, {'items': film_services}
+
+        if method == 'GET' and path == '/news':
+            return 200, page(fixtures.news, query)
+
+        if method == 'GET' and path == '/search':
+            term = query.get('input', [''])[0].lower()
+            results = [
+                {'type': 'ContributorSearchItem', 'score': 1.0, 'contributor': contributor}
+                for contributor in fixtures.contributors.values() if term in contributor['name'].lower()
+            ][:100]
+            results += [
+                {'type': 'FilmSearchItem', 'score': 0.5, 'film': film}
+                for film in fixtures.films if term in film['name'].lower()
+            ][:100]
+            return 200, page(results, query)
+
+        return 404, None
+
+    def respond(self, method, host, target, headers, body):
+        """Return `(status, headers, content)` for a raw request to `target` (path and query)."""
+        self.count('requests')
+
+        if self.latency or self.jitter:
+            time.sleep(self.latency + random.uniform(0, self.jitter))
+
+        if self.throttle and random.random() < self.throttle:
+            self.count('throttled')
+            return self.reply(429, None, headers, {'Retry-After': str(self.retry_after)})
+
+        url = 'http://' + host + target
+        split = urlsplit(target)
+        query = parse_qs(split.query)
+
+        error = self.verify(method, url, query, body)
+        if error is not None:
+            self.count('rejected')
+            return self.reply(401, {'code': 'SignatureInvalid', 'message': error}, headers)
+
+        path = split.path[len(api_prefix):] if split.path.startswith(api_prefix) else split.path
+        status, json_body = self.route(method, path, query, body, headers)
+
+        return self.reply(status, json_body, headers)
+
+    def reply(self, status, json_body, request_headers, headers=None):
+        content = json.dumps(json_body).encode() if json_body is not None else b''
+        headers = dict(headers or {})
+
+        if status == 200 and self.etags:
+            etag = '"{}"'.format(hashlib.sha1(content).hexdigest()[:16])
+            headers['ETag'] = etag
+            if request_headers.get('If-None-Match') == etag:
+                self.count('not_modified')
+                status, content = 304, b''
+
+        if content:
+            headers['Content-Type'] = 'application/json'
+            if self.compress:
+                content = self._encode(content, request_headers.get('Accept-Encoding', ''), headers)
+
+        return status, headers, content
+
+    @staticmethod
+    def _encode(content, accept_encoding, headers):
+        accepted = {encoding.split(';')[0].strip() for encoding in accept_encoding.split(',')}
+        headers['Vary'] = 'Accept-Encoding'
+
+        if 'br' in accepted and brotli is not None:
+            headers['Content-Encoding'] = 'br'
+            return brotli.compress(content)
+        if 'gzip' in accepted:
+            headers['Content-Encoding'] = 'gzip'
+            return gzip.compress(content, compresslevel=6)
+
+        return content
+
+    def _server(self, host, port):
+        server = ThreadingHTTPServer((host, port), self._handler())
+        server.daemon_threads = True
+
+        return server
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def handle_any(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length).decode() if length else ''
+
+                status, headers, content = mock.respond(self.command, self.headers['Host'], self.path,
+                                                        self.headers, body)
+
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            do_GET = do_POST = do_PATCH = do_DELETE = handle_any
+
+            def date_time_string(self, timestamp=None):
+                # the `Date` header follows the (possibly skewed) server clock
+                return super().date_time_string(mock.now() if timestamp is None else timestamp)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+class MockLetterboxdH2(MockLetterboxd):
+    """`MockLetterboxd` speaking cleartext HTTP/2 (h2c with prior knowledge).
+
+    Every stream is answered on its own thread, so concurrent requests on
+    one connection are served concurrently. Requires the `h2` package.
+    """
+
+    def _server(self, host, port):
+        server = ThreadingTCPServer((host, port), self._h2_handler())
+        server.daemon_threads = True
+
+        return server
+
+    def _h2_handler(self):
+        from h2.config import H2Configuration
+        from h2.connection import H2Connection
+        from h2.events import ConnectionTerminated, DataReceived, RequestReceived, StreamEnded
+
+        mock = self
+
+        class Handler(BaseRequestHandler):
+            def setup(self):
+                self.connection = H2Connection(H2Configuration(client_side=False, header_encoding='utf-8'))
+                self.lock = threading.Condition()
+                self.streams = {}
+
+            def flush(self):
+                # called with the lock held
+                data = self.connection.data_to_send()
+                if data:
+                    self.request.sendall(data)
+
+            def handle(self):
+                with self.lock:
+                    self.connection.initiate_connection()
+                    self.flush()
+
+                while True:
+                    data = self.request.recv(65536)
+                    if not data:
+                        return
+
+                    with self.lock:
+                        events = self.connection.receive_data(data)
+                        for event in events:
+                            if isinstance(event, RequestReceived):
+                                self.streams[event.stream_id] = (dict(event.headers), [])
+                            elif isinstance(event, DataReceived):
+                                self.streams[event.stream_id][1].append(event.data)
+                                self.connection.acknowledge_received_data(event.flow_controlled_length,
+                                                                          event.stream_id)
+                            elif isinstance(event, StreamEnded):
+                                headers, body = self.streams.pop(event.stream_id)
+                                threading.Thread(target=self.respond, args=(event.stream_id, headers, body),
+                                                 daemon=True).start()
+                            elif isinstance(event, ConnectionTerminated):
+                                return
+                        self.flush()
+                        # flow-control windows may have opened up for responses waiting to send
+                        self.lock.notify_all()
+
+            def respond(self, stream_id, headers, body):
+                request_headers = {name.title(): value for name, value in headers.items()}
+                status, response_headers, content = mock.respond(
+                    headers[':method'], headers[':authority'], headers[':path'], request_headers,
+                    b''.join(body).decode()
+                )
+
+                response_headers = dict(response_headers, date=formatdate(mock.now(), usegmt=True))
+                with self.lock:
+                    self.connection.send_headers(stream_id, [(':status', str(status)),
+                                                             ('content-length', str(len(content)))] +
+                                                 [(name.lower(), value) for name, value in response_headers.items()],
+                                                 end_stream=not content)
+                    self.flush()
+
+                    # send the body as fast as the client's flow-control window allows
+                    while content:
+                        window = min(self.connection.local_flow_control_window(stream_id),
+                                     self.connection.max_outbound_frame_size)
+                        if window <= 0:
+                            self.lock.wait()
+                            continue
+                        chunk, content = content[:window], content[window:]
+                        self.connection.send_data(stream_id, chunk, end_stream=not content)
+                        self.flush()
+
+        return Handler
+
+
+def _serve(connection, kwargs):
+    server_class = MockLetterboxdH2 if kwargs.pop('http2', False) else MockLetterboxd
+    server = server_class(**kwargs)
+    connection.send(server.base_url)
+    server.server.serve_forever()
+
+
+class MockLetterboxdProcess:
+    """Runs `MockLetterboxd` in a child process.
+
+    Benchmarks use this so the server's CPU time and allocations don't
+    count against the client being measured. With `http2=True` the child
+    runs `MockLetterboxdH2` instead.
+    """
+
+    def __init__(self, **kwargs):
+        self.api_key = kwargs.setdefault('api_key', 'mock-key')
+        self.api_secret = kwargs.setdefault('api_secret', 'mock-secret')
+        self.kwargs = kwargs
+        self.process = None
+        self.base_url = None
+
+    def start(self):
+        parent, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_serve, args=(child, self.kwargs), daemon=True)
+        self.process.start()
+        self.base_url = parent.recv()
+
+        return self
+
+    def stop(self):
+        self.process.terminate()
+        self.process.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser()
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response.')
+    parser.add_argument('--throttle', type=float, default=0.0, help='Fraction of requests answered with 429.')
+    args = parser.parse_args()
+
+    server = MockLetterboxd(port=args.port, latency=args.latency, throttle=args.throttle)
+    print('Serving the mock Letterboxd API at', server.base_url)
+    print('API Key:', server.api_key, 'API Secret:', server.api_secret)
+    server.server.serve_forever()
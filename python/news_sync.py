@@ -0,0 +1,150 @@
+"""
+Incremental GET /news sync
+http://api-docs.letterboxd.com/#path--news
+
+`news.py` always fetches and prints the first page of the feed, so a job
+polling every few minutes mostly re-processes items it has already seen.
+`NewsSync` keeps a high-water mark (the newest item seen) and a bounded set
+of recently seen item keys in a small state file. Each run pages through
+the feed, newest first, only until it reaches an item it has seen before,
+and emits just the new items, so requests and processing follow the amount
+of new content rather than the size of the feed.
+
+Python 3:
+$ export LETTERBOXD_API_KEY=... LETTERBOXD_API_SECRET=...
+$ python3 ./news_sync.py --state news-state.json >> news.ndjson
+
+"""
+
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from collections import deque
+
+from letterboxd_client import LetterboxdClient
+from letterboxd_pagination import iter_pages
+from letterboxd_stream import write_ndjson
+
+
+def item_key(item):
+    # news items are identified by their id when present, otherwise by their URL
+    return item.get('id') or item.get('url') or item['title']
+
+
+class SeenSet:
+    """The `size` most recently added keys, with O(1) membership tests."""
+
+    def __init__(self, keys=(), size=10000):
+        self.order = deque(maxlen=size)
+        self.keys = set()
+        for key in keys:
+            self.add(key)
+
+    def __contains__(self, key):
+        return key in self.keys
+
+    def __iter__(self):
+        return iter(self.order)
+
+    def add(self, key):
+        if key in self.keys:
+            return
+        if len(self.order) == self.order.maxlen:
+            self.keys.discard(self.order[0])
+        self.order.append(key)
+        self.keys.add(key)
+
+
+class NewsSync:
+    """Fetches only the news items published since the previous sync.
+
+    `initial_items` caps how much of the feed the very first sync reads,
+    when there is no high-water mark yet.
+    """
+
+    def __init__(self, client, state_path=None, per_page=20, initial_items=100, seen_size=10000):
+        self.client = client
+        self.state_path = state_path
+        self.per_page = per_page
+        self.initial_items = initial_items
+
+        self.high_water = None
+        seen = []
+        if state_path and os.path.exists(state_path):
+            with open(state_path, encoding='utf-8') as file:
+                state = json.load(file)
+            self.high_water = state.get('high_water')
+            seen = state.get('seen', [])
+        self.seen = SeenSet(seen, seen_size)
+
+        self.pages_fetched = 0
+
+    def save(self):
+        if not self.state_path:
+            return
+
+        # write the new state next to the old one and swap, so a crash never leaves it half written
+        temporary_path = self.state_path + '.tmp'
+        with open(temporary_path, 'w', encoding='utf-8') as file:
+            json.dump({'high_water': self.high_water, 'seen': list(self.seen)}, file)
+        os.replace(temporary_path, self.state_path)
+
+    def new_items(self):
+        """Return the new items, newest first, and advance the high-water mark."""
+        new_items = []
+        first_sync = self.high_water is None
+
+        for items, _ in iter_pages(self.client.news, perPage=self.per_page):
+            self.pages_fetched += 1
+            reached_seen = False
+
+            for item in items:
+                key = item_key(item)
+                if key == self.high_water or key in self.seen:
+                    reached_seen = True
+                    break
+                new_items.append(item)
+
+            if reached_seen or (first_sync and len(new_items) >= self.initial_items):
+                break
+
+        if first_sync:
+            new_items = new_items[:self.initial_items]
+
+        if new_items:
+            self.high_water = item_key(new_items[0])
+            # oldest first, so the newest ends up last in the bounded set
+            for item in reversed(new_items):
+                self.seen.add(item_key(item))
+
+        return new_items
+
+    def sync(self, out):
+        """Write the new items to `out` as NDJSON, oldest first, then save the state."""
+        new_items = self.new_items()
+        write_ndjson(reversed(new_items), out)
+        self.save()
+
+        return len(new_items)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--state', default='news-state.json',
+                        help='File holding the high-water mark and seen items.')
+    parser.add_argument('--per-page', type=int, default=20, dest='per_page', help='Items per page.')
+    parser.add_argument('--initial-items', type=int, default=100, dest='initial_items',
+                        help='Items to emit on the very first sync.')
+    parser.add_argument('--config', help='INI file with the API Key and API Secret.')
+    args = parser.parse_args()
+
+    with LetterboxdClient.from_config(args.config) as client:
+        news_sync = NewsSync(client, args.state, args.per_page, args.initial_items)
+        count = news_sync.sync(sys.stdout)
+
+    sys.stderr.write(json.dumps({'new_items': count, 'pages': news_sync.pages_fetched}) + '\n')
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+"""
+Bulk profile sync for GET/PATCH /me
+http://api-docs.letterboxd.com/#path--me
+
+`me.py --patch` sends a hand-written body for one member. `ProfileSync`
+keeps the settings of many managed accounts in line with a desired state:
+for every account it fetches the current settings with GET /me, diffs them
+against the desired `MemberSettingsUpdateRequest` fields and only sends a
+PATCH, holding just the fields that differ, when something actually
+changed. Accounts are processed concurrently, each with its own
+`TokenManager`, and refresh tokens can be kept in a file so later runs skip
+the password grant.
+
+A `password` (with `currentPassword`) in the settings can't be diffed, so
+it is only sent with `--change-passwords`, in a PATCH of its own; take it
+out of the file once it was applied.
+
+The accounts file has one JSON object per line:
+{"username": "tony", "password": "...", "settings": {"location": "New York", "emailNews": false}}
+
+Python 3:
+$ export LETTERBOXD_API_KEY=... LETTERBOXD_API_SECRET=...
+$ python3 ./profile_sync.py accounts.ndjson --tokens tokens.json > results.ndjson
+$ python3 ./profile_sync.py accounts.ndjson --dry-run
+$ python3 ./profile_sync.py accounts.ndjson --change-passwords
+
+"""
+
+import json
+import os
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from letterboxd_client import LetterboxdClient, LetterboxdError
+from letterboxd_stream import write_ndjson
+from letterboxd_token import TokenManager
+
+# see here for the fields http://api-docs.letterboxd.com/#/definitions/MemberSettingsUpdateRequest
+settings_fields = (
+    'emailAddress', 'givenName', 'familyName', 'pronoun', 'location', 'website', 'bio', 'favoriteFilms',
+    'privateAccount', 'includeInPeopleSection', 'emailWhenFollowed', 'emailComments', 'emailNews', 'emailRushes'
+)
+
+# write-only fields that GET /me never returns, so they can't be diffed
+password_fields = ('currentPassword', 'password')
+
+
+def _identifier(value):
+    # pronouns and favorite films are returned as objects but updated by ID
+    return value['id'] if isinstance(value, dict) else value
+
+
+def current_settings(json_response):
+    """The `MemberSettingsUpdateRequest` view of a GET /me response."""
+    # see here for the response properties http://api-docs.letterboxd.com/#/definitions/MemberAccount
+    member = json_response.get('member', {})
+    settings = {}
+
+    for field in settings_fields:
+        if field in json_response:
+            value = json_response[field]
+        elif field == 'bio' and 'bioLbml' in member:
+            # `bio` is rendered HTML, `bioLbml` the text the member wrote
+            value = member['bioLbml']
+        elif field in member:
+            value = member[field]
+        else:
+            continue
+
+        if field == 'pronoun':
+            value = _identifier(value)
+        elif field == 'favoriteFilms':
+            value = [_identifier(film) for film in value]
+        settings[field] = value
+
+    return settings
+
+
+def diff_settings(current, desired):
+    """The smallest update turning `current` into `desired`, `{}` when they match."""
+    update = {field: value for field, value in desired.items()
+              if field not in password_fields and current.get(field) != value}
+
+    # changing the email address needs the current password
+    if 'emailAddress' in update and 'currentPassword' in desired:
+        update['currentPassword'] = desired['currentPassword']
+
+    return update
+
+
+def password_change(desired):
+    """The update setting the password in `desired`, `{}` when there is none."""
+    if 'password' not in desired:
+        return {}
+
+    return {field: desired[field] for field in password_fields if field in desired}
+
+
+class ProfileSync:
+    """Applies desired settings to many accounts, skipping no-op writes.
+
+    `refresh_tokens` maps usernames to refresh tokens from an earlier run.
+    With `dry_run` the diffs are computed and reported but nothing is sent.
+    Passwords in the settings are ignored unless `change_passwords` is set.
+    """
+
+    def __init__(self, client, workers=8, refresh_tokens=None, dry_run=False, change_passwords=False):
+        self.client = client
+        self.workers = workers
+        self.refresh_tokens = dict(refresh_tokens or {})
+        self.dry_run = dry_run
+        self.change_passwords = change_passwords
+        self.token_managers = {}
+
+    def token_manager(self, account):
+        username = account['username']
+        token_manager = self.token_managers.get(username)
+        if token_manager is None:
+            token_manager = self.token_managers[username] = TokenManager(
+                self.client, username, account.get('password'),
+                refresh_token=account.get('refreshToken') or self.refresh_tokens.get(username),
+                background=False
+            )
+
+        return token_manager
+
+    def sync_account(self, account):
+        """Sync one account and return a result record for it."""
+        result = {'username': account['username']}
+        token_manager = None
+
+        try:
+            token_manager = self.token_manager(account)
+
+            response = self.client.me_get(token_manager)
+            if response.status_code != 200:
+                raise LetterboxdError(response)
+
+            settings = account.get('settings', {})
+            update = diff_settings(current_settings(response.json()), settings)
+            result['fields'] = sorted(field for field in update if field not in password_fields)
+            result['status'] = self.apply(update, token_manager, result)
+
+            # after the settings, which may need the current password for a new email address
+            password_update = password_change(settings) if self.change_passwords else {}
+            if password_update and result['status'] != 'error':
+                result['password'] = self.apply(password_update, token_manager, result)
+        except (LetterboxdError, ValueError, requests.RequestException) as error:
+            result['status'] = 'error'
+            result['error'] = str(error)
+        finally:
+            # a refresh token rotated before a failure is the only one left that works
+            if token_manager is not None and token_manager.refresh_token is not None:
+                self.refresh_tokens[account['username']] = token_manager.refresh_token
+
+        return result
+
+    def apply(self, update, token_manager, result):
+        """Send `update` unless it is empty or this is a dry run; returns the outcome."""
+        if not update:
+            return 'unchanged'
+        if self.dry_run:
+            return 'changed'
+
+        response = self.client.me_patch(update, token_manager)
+        if response.status_code != 200:
+            raise LetterboxdError(response)
+        # the API reports rejected fields as messages on a 200
+        # see here http://api-docs.letterboxd.com/#/definitions/MemberSettingsUpdateResponse
+        messages = response.json().get('messages', [])
+        if messages:
+            result.setdefault('messages', []).extend(messages)
+            return 'error'
+
+        return 'updated'
+
+    def sync(self, accounts):
+        """Sync `accounts` concurrently, yielding results in input order."""
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            yield from executor.map(self.sync_account, accounts)
+
+
+def read_accounts(path):
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def save_tokens(path, refresh_tokens):
+    # refresh tokens are credentials: keep the file private and swap it in atomically
+    temporary_path = path + '.tmp'
+    with open(os.open(temporary_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), 'w') as file:
+        json.dump(refresh_tokens, file)
+    os.replace(temporary_path, path)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('accounts', help='NDJSON file of {"username", "password", "settings"} objects.')
+    parser.add_argument('--tokens', help='JSON file caching refresh tokens between runs.')
+    parser.add_argument('--workers', type=int, default=8, help='Accounts synced in parallel.')
+    parser.add_argument('--dry-run', action='store_true', dest='dry_run', help='Report the diffs, send no PATCH.')
+    parser.add_argument('--change-passwords', action='store_true', dest='change_passwords',
+                        help='Also set the passwords given in the settings.')
+    parser.add_argument('--config', help='INI file with the API Key and API Secret.')
+    args = parser.parse_args()
+
+    refresh_tokens = {}
+    if args.tokens and os.path.exists(args.tokens):
+        with open(args.tokens, encoding='utf-8') as file:
+            refresh_tokens = json.load(file)
+
+    with LetterboxdClient.from_config(args.config, pool_maxsize=args.workers) as client:
+        profile_sync = ProfileSync(client, args.workers, refresh_tokens, args.dry_run, args.change_passwords)
+        try:
+            write_ndjson(profile_sync.sync(read_accounts(args.accounts)), sys.stdout)
+        finally:
+            # saved even when the run is cut short, the old refresh tokens may have been rotated already
+            if args.tokens:
+                save_tokens(args.tokens, profile_sync.refresh_tokens)
+
+
+if __name__ == "__main__":
+    main()
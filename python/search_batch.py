@@ -0,0 +1,115 @@
+"""
+Batch GET /search
+http://api-docs.letterboxd.com/#path--search
+
+Non-interactive counterpart of `search.py`: credentials come from the
+environment or a config file (see `letterboxd_client.load_credentials`) and
+search terms are read one per line from a file or stdin. The searches run
+concurrently over a single pooled client, and every result is written to
+stdout as one line of NDJSON as soon as it arrives:
+
+    {"input": "Pulp Fiction", "status": 200, "items": [...]}
+
+A search that fails without a response, e.g. on a timeout, is written as
+`{"input": ..., "error": ...}` and the batch carries on.
+
+Python 3:
+$ export LETTERBOXD_API_KEY=... LETTERBOXD_API_SECRET=...
+$ python3 ./search_batch.py titles.txt > results.ndjson
+$ cat titles.txt | python3 ./search_batch.py --concurrency 32 --per-page 5
+
+"""
+
+import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import requests
+
+from letterboxd_client import LetterboxdClient
+from letterboxd_stream import dumps
+
+
+def search_terms(lines):
+    for line in lines:
+        term = line.strip()
+        if term:
+            yield term
+
+
+def search_many(client, terms, concurrency=16, **params):
+    """Yield `(term, response)` for every term, in completion order.
+
+    At most `2 * concurrency` searches are queued at once, so arbitrarily
+    long inputs are read lazily and never held in memory. A term whose
+    request failed (`requests.RequestException`) yields the exception in
+    place of the response.
+    """
+    terms = iter(terms)
+    pending = {}
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def submit():
+            for term in terms:
+                pending[executor.submit(client.search, term, **dict(params))] = term
+                if len(pending) >= 2 * concurrency:
+                    return
+
+        submit()
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                term = pending.pop(future)
+                try:
+                    yield term, future.result()
+                except requests.RequestException as error:
+                    yield term, error
+            submit()
+
+
+def search_record(term, response):
+    """The NDJSON record of one `search_many` result."""
+    if isinstance(response, Exception):
+        return {'input': term, 'error': '{}: {}'.format(type(response).__name__, response)}
+
+    record = {'input': term, 'status': response.status_code}
+    if response.status_code == 200:
+        record['items'] = response.json().get('items', [])
+
+    return record
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('input', nargs='?', default='-',
+                        help='File with one search term per line (default: stdin).')
+    parser.add_argument('--config', help='INI file with the API Key and API Secret.')
+    parser.add_argument('--concurrency', type=int, default=16,
+                        help='Number of searches in flight at once.')
+    parser.add_argument('--per-page', type=int, dest='per_page', help='Results per search.')
+    parser.add_argument('--search-method', dest='search_method',
+                        help='FullText, Autocomplete or NamesAndKeywords.')
+    parser.add_argument('--include', action='append',
+                        help='Result types to include, e.g. FilmSearchItem (repeatable).')
+    args = parser.parse_args()
+
+    # see here for the allowed values http://api-docs.letterboxd.com/#/definitions/SearchRequest
+    params = {}
+    if args.per_page:
+        params['perPage'] = args.per_page
+    if args.search_method:
+        params['searchMethod'] = args.search_method
+    if args.include:
+        params['include'] = args.include
+
+    lines = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    out = sys.stdout.buffer
+
+    with LetterboxdClient.from_config(args.config, pool_maxsize=args.concurrency) as client:
+        for term, response in search_many(client, search_terms(lines), args.concurrency, **params):
+            out.write(dumps(search_record(term, response)) + b'\n')
+            out.flush()
+
+
+if __name__ == "__main__":
+    main()
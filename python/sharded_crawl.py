@@ -0,0 +1,210 @@
+"""
+Multi-process sharded contributions crawl and batch search
+http://api-docs.letterboxd.com/#path--contributor--id--contributions
+http://api-docs.letterboxd.com/#path--search
+
+With millions of IDs or terms a single interpreter runs out of CPU long
+before the API runs out of quota: decoding JSON and signing requests all
+happen under one GIL. `sharded_crawl` splits the input across worker
+processes by a stable hash, so a resumed run sends every ID to the same
+shard again. Each worker has its own pooled client and a `Scheduler` with
+an equal share of the global `--rate`, and runs either the
+`FilmographyCrawler` or `search_many` over its shard. All output goes back
+to the parent, the single writer of the output file and checkpoint.
+
+Python 3:
+$ export LETTERBOXD_API_KEY=... LETTERBOXD_API_SECRET=...
+$ python3 ./sharded_crawl.py contributions directors.txt --processes 8 --rate 40 --checkpoint crawl.checkpoint > contributions.ndjson
+$ python3 ./sharded_crawl.py search titles.txt --processes 8 --rate 40 > results.ndjson
+
+"""
+
+import json
+import multiprocessing
+import queue as queues
+import sys
+import zlib
+from argparse import ArgumentParser
+
+from filmography_crawler import Checkpoint, FilmographyCrawler
+from letterboxd_client import LetterboxdClient
+from letterboxd_scheduler import Scheduler
+from letterboxd_stream import dumps
+from search_batch import search_many, search_record
+
+# search results are sent to the parent in batches of this many lines
+batch_size = 100
+
+
+def shard_of(item, shards):
+    # `hash()` of a string changes between interpreters, crc32 does not
+    return zlib.crc32(item.encode()) % shards
+
+
+def split(items, shards):
+    parts = [[] for _ in range(shards)]
+    for item in dict.fromkeys(items):
+        parts[shard_of(item, shards)].append(item)
+
+    return parts
+
+
+class ShardOutput:
+    """Worker-side stand-in for the crawler's output file and checkpoint.
+
+    Lines are buffered until their partition is checkpointed, then sent to
+    the parent together with the partition key, which the parent writes in
+    that order, so the checkpoint never gets ahead of the output.
+    """
+
+    def __init__(self, queue, done=()):
+        self.queue = queue
+        self.done = done
+        self.lines = []
+
+    def __contains__(self, key):
+        return key in self.done
+
+    def write(self, lines):
+        self.lines.append(lines)
+
+    def flush(self):
+        pass
+
+    def add(self, key):
+        self.queue.put((b''.join(self.lines), key))
+        self.lines = []
+
+
+def _crawl_contributions(client, items, output, options):
+    crawler = FilmographyCrawler(client, output, output, options['partition_by'], options['workers'])
+    crawler.crawl(items)
+
+
+def _search(client, items, output, options):
+    for term, response in search_many(client, items, options['workers'], **options['params']):
+        output.write(dumps(search_record(term, response)) + b'\n')
+
+        if len(output.lines) >= batch_size:
+            output.add(None)
+
+    output.add(None)
+
+
+modes = {
+    'contributions': _crawl_contributions,
+    'search': _search
+}
+
+
+def _worker(mode, items, queue, done, options):
+    # one pooled client and one share of the global rate per process
+    scheduler = Scheduler(rate=options['rate'])
+    try:
+        with LetterboxdClient.from_config(options['config'], pool_maxsize=options['workers'],
+                                          scheduler=scheduler) as client:
+            modes[mode](client, items, ShardOutput(queue, done), options)
+    except Exception as error:
+        queue.put(('error', repr(error)))
+        raise
+    finally:
+        queue.put(None)
+
+
+def sharded_crawl(mode, items, out, checkpoint=None, processes=None, rate=10, workers=16, config=None,
+                  partition_by=('type',), **params):
+    """Run `mode` over `items` in `processes` worker processes, writing NDJSON to `out`.
+
+    `rate` is the request rate of all processes together. Returns the number
+    of checkpointed partitions (or search batches) written.
+    """
+    processes = processes or multiprocessing.cpu_count()
+    checkpoint = checkpoint or Checkpoint(None)
+    # only shards with input get a process, and they share all of the rate
+    parts = [part for part in split(items, processes) if part]
+    options = {
+        'config': config,
+        'rate': rate / max(len(parts), 1),
+        'workers': workers,
+        'partition_by': tuple(partition_by),
+        'params': params
+    }
+
+    queue = multiprocessing.Queue(maxsize=4 * processes)
+    shards = [
+        multiprocessing.Process(target=_worker, args=(mode, part, queue, checkpoint.done, options), daemon=True)
+        for part in parts
+    ]
+    for shard in shards:
+        shard.start()
+
+    written, running, errors = 0, len(shards), []
+    while running:
+        try:
+            message = queue.get(timeout=1.0)
+        except queues.Empty:
+            # a worker killed outright never sends its sentinel
+            if not any(shard.is_alive() for shard in shards):
+                errors.append('{} worker(s) exited without finishing'.format(running))
+                break
+            continue
+
+        if message is None:
+            running -= 1
+        elif message[0] == 'error':
+            errors.append(message[1])
+        else:
+            lines, key = message
+            out.write(lines)
+            out.flush()
+            if key is not None:
+                checkpoint.add(key)
+            written += 1
+
+    for shard in shards:
+        shard.join()
+
+    if errors:
+        raise RuntimeError('{} of {} shards failed: {}'.format(len(errors), len(shards), '; '.join(errors)))
+
+    return written
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('mode', choices=sorted(modes), help='What to run over the input.')
+    parser.add_argument('input', nargs='?', default='-',
+                        help='File with one contributor LID or search term per line (default: stdin).')
+    parser.add_argument('--processes', type=int, help='Worker processes (default: one per core).')
+    parser.add_argument('--rate', type=float, default=10, help='Requests per second of all processes together.')
+    parser.add_argument('--workers', type=int, default=16, help='Requests in flight per process.')
+    parser.add_argument('--partition', action='append', choices=['type', 'decade'],
+                        help='Filter to split each filmography on (repeatable, default: type).')
+    parser.add_argument('--per-page', type=int, dest='per_page', help='Results per search.')
+    parser.add_argument('--checkpoint', help='File recording completed partitions, for resuming.')
+    parser.add_argument('--output', help='NDJSON file to append to (default: stdout).')
+    parser.add_argument('--config', help='INI file with the API Key and API Secret.')
+    args = parser.parse_args()
+
+    lines = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    items = [line.strip() for line in lines if line.strip()]
+
+    # see here for the allowed values http://api-docs.letterboxd.com/#/definitions/SearchRequest
+    params = {}
+    if args.mode == 'search' and args.per_page:
+        params['perPage'] = args.per_page
+
+    out = open(args.output, 'ab') if args.output else sys.stdout.buffer
+    checkpoint = Checkpoint(args.checkpoint if args.mode == 'contributions' else None)
+
+    try:
+        written = sharded_crawl(args.mode, items, out, checkpoint, args.processes, args.rate, args.workers,
+                                args.config, args.partition or ['type'], **params)
+    finally:
+        checkpoint.close()
+
+    sys.stderr.write(json.dumps({'batches': written}) + '\n')
+
+
+if __name__ == "__main__":
+    main()